@@ -1,16 +1,41 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict
-from collections import Counter
-import random
+from typing import Awaitable, Callable, List, Dict, Literal, Optional, Union
+from functools import partial
+import asyncio
+import json
+import logging
+import math
 import string
+from cipher_core import caesar_ascii_encrypt, caesar_ascii_decrypt, substitute, unsubstitute, CompiledKey
+from frequency_analysis import best_candidates, DEFAULT_SAMPLE_SIZE
+from text_stats import TextStats, frequency_order
+from substitution_solver import solve, DEFAULT_RESTARTS, DEFAULT_TIME_LIMIT, DEFAULT_MAX_ITERATIONS
+from language_model import get_model, available_languages, DEFAULT_LANGUAGE
+from word_scorer import get_word_scorer, DEFAULT_SAMPLE_SIZE as WORD_SAMPLE_SIZE
+from polyalphabetic import key_shifts, encrypt as polyalphabetic_encrypt, decrypt as polyalphabetic_decrypt
+from vigenere_attack import vigenere_attack, DEFAULT_MAX_KEY_LENGTH, DEFAULT_LENGTH_CANDIDATES
+from streaming import TransformStreamingResponse, decode_stream
+from batch import run_batch
+from executor import run, choose_lane, queue_depth, ExecutorBusy, INLINE, THREAD
+from jobs import JobStore, JobScheduler, JobLimitExceeded, JobQueueFull, POLL_INTERVAL, FINISHED
+from attack_jobs import CaesarJob, MonoalphabeticJob
+from key_store import key_store
+from key_pool import key_pool
+from result_cache import result_cache, result_key
+from metrics import MetricsMiddleware, TimedRoute, render_metrics
+from negotiation import (negotiate, render_cipher, render_content, render_results, CIPHER_TYPES,
+                         ATTACK_TYPES, JSON, NDJSON, MSGPACK)
 
 app = FastAPI(
     title="Cipher API",
-    description="API for Caesar and Monoalphabetic Cipher operations",
+    description="API for Caesar, Monoalphabetic and Vigenère Cipher operations",
     version="1.0.0"
 )
+# Routes record validation and serialization time for the metrics
+app.router.route_class = TimedRoute
 
 # Add CORS middleware
 app.add_middleware(
@@ -21,154 +46,736 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latency, body size and stage metrics for /metrics, and X-Profile profiling
+app.add_middleware(MetricsMiddleware)
+
+# Executor errors: full pools and slow results
+@app.exception_handler(ExecutorBusy)
+async def executor_busy_handler(request: Request, exc: ExecutorBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+# Job limits: too many jobs of one client, or a full queue
+@app.exception_handler(JobLimitExceeded)
+async def job_limit_handler(request: Request, exc: JobLimitExceeded):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": "10"})
+
+@app.exception_handler(JobQueueFull)
+async def job_queue_full_handler(request: Request, exc: JobQueueFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "10"})
+
+@app.exception_handler(asyncio.TimeoutError)
+async def timeout_handler(request: Request, exc: asyncio.TimeoutError):
+    return JSONResponse(status_code=504, content={"detail": "The operation timed out"})
+
+# Attack defaults
+DEFAULT_TOP_K = 5
+DEFAULT_PREVIEW_LENGTH = 200
+RERANK_POOL = 16  # Best chi-squared shifts re-ranked by dictionary-word coverage
+MAX_RESTARTS = 64
+MAX_TIME_LIMIT = 60.0
+SOLVER_TIMEOUT_MARGIN = 5.0  # Seconds allowed on top of the solver's time_limit
+MAX_VIGENERE_KEY_LENGTH = 100
+MAX_JOB_TIME_LIMIT = 3600.0  # Search budget allowed for background attack jobs
+
+# Batch limits
+MAX_BATCH_ITEMS = 100_000
+
 # Request and Response Models
 class CipherRequest(BaseModel):
     text: str
     shift: int = None  # Optional for monoalphabetic, required for Caesar
+    key_id: Optional[str] = None  # Registered monoalphabetic key (random key when omitted)
 
 class DecryptRequest(BaseModel):
     text: str
     key: Dict[str, str] = None  # For monoalphabetic
+    key_id: Optional[str] = None  # For monoalphabetic, instead of key
     shift: int = None  # For Caesar
 
 class CipherResponse(BaseModel):
     result: str
     key: Dict[str, str] = None  # For monoalphabetic
+    key_id: Optional[str] = None  # For monoalphabetic
+
+class KeyRequest(BaseModel):
+    key: Optional[Dict[str, str]] = None  # Random key when omitted
+
+class KeyResponse(BaseModel):
+    key_id: str
+    key: Dict[str, str]
+
+class AttackRequest(BaseModel):
+    text: str
+    top_k: int = DEFAULT_TOP_K  # Number of best candidates to return
+    sample_size: int = DEFAULT_SAMPLE_SIZE  # Characters used to score each candidate
+    include: Literal["full", "preview", "none"] = "full"  # Plaintext returned per candidate
+    preview_length: int = DEFAULT_PREVIEW_LENGTH
+    language: str = DEFAULT_LANGUAGE  # Language of the plaintext
+
+class CaesarJobRequest(BaseModel):
+    text: str
+    top_k: int = DEFAULT_TOP_K  # Number of best candidates to return
+    include: Literal["full", "preview", "none"] = "full"  # Plaintext returned per candidate
+    preview_length: int = DEFAULT_PREVIEW_LENGTH
+    language: str = DEFAULT_LANGUAGE  # Language of the plaintext
+
+class MonoalphabeticAttackRequest(BaseModel):
+    text: str
+    restarts: int = DEFAULT_RESTARTS  # Random-restart climbs, run in parallel
+    time_limit: float = DEFAULT_TIME_LIMIT  # Search budget in seconds
+    max_iterations: int = DEFAULT_MAX_ITERATIONS  # Key evaluations over all restarts
+    seed: Optional[int] = None
+    top_k: int = 1  # Distinct restart results to return
+    language: str = DEFAULT_LANGUAGE  # Language of the plaintext
+
+class VigenereRequest(BaseModel):
+    text: str
+    key: str  # Key word of the letters A-Z
+    variant: Literal["vigenere", "beaufort", "autokey"] = "vigenere"
+
+class VigenereAttackRequest(BaseModel):
+    text: str
+    variant: Literal["vigenere", "beaufort"] = "vigenere"
+    max_key_length: int = DEFAULT_MAX_KEY_LENGTH  # Longest key length considered
+    lengths: int = DEFAULT_LENGTH_CANDIDATES  # Best key lengths solved, one candidate each
+    include: Literal["full", "preview", "none"] = "full"  # Plaintext returned per candidate
+    preview_length: int = DEFAULT_PREVIEW_LENGTH
+    language: str = DEFAULT_LANGUAGE  # Language of the plaintext
+
+class BatchItem(BaseModel):
+    op: Literal["caesar_encrypt", "caesar_decrypt", "monoalphabetic_encrypt", "monoalphabetic_decrypt"]
+    text: str
+    shift: Optional[int] = None  # For Caesar
+    key: Optional[Dict[str, str]] = None  # For monoalphabetic (random key when encrypting without one)
+    key_id: Optional[str] = None  # For monoalphabetic, instead of key
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+    format: Literal["json", "ndjson"] = "json"
 
 class AttackResponse(BaseModel):
     results: List[dict]
 
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+
 # Caesar Cipher Implementation
 def caesar_encrypt(text: str, shift: int) -> str:
-    result = ""
-    for char in text:
-        if char.isascii():  # Only encrypt ASCII characters
-            # Convert to ASCII, apply shift, and wrap around 256
-            ascii_val = ord(char)
-            shifted = (ascii_val + shift) % 256
-            result += chr(shifted)
-        else:
-            result += char  # Keep non-ASCII characters unchanged
-    return result
+    # Only ASCII characters are shifted (wrapping around 256); non-ASCII
+    # characters are kept unchanged by the translation table
+    return caesar_ascii_encrypt(text, shift)
 
 def caesar_decrypt(text: str, shift: int) -> str:
     # For decryption, we use the negative of the shift value
-    decrypt_shift = (256 - shift) % 256  # This ensures proper wrap-around
-    return caesar_encrypt(text, decrypt_shift)
+    return caesar_ascii_decrypt(text, shift)
+
+def score_value(score: float) -> Optional[float]:
+    """A chi-squared score for JSON: rounded, or None for text without letters (infinite score)"""
+    return round(score, 3) if math.isfinite(score) else None
+
+def caesar_attack(text: str, top_k: int = DEFAULT_TOP_K, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                  include: str = "full", preview_length: int = DEFAULT_PREVIEW_LENGTH,
+                  language: str = DEFAULT_LANGUAGE) -> List[dict]:
+    """
+    Rank all 256 shifts by chi-squared on a bounded sample and decrypt only the best ones
+    The best RERANK_POOL shifts are then ordered by the dictionary-word coverage
+    of their decrypted sample (`confidence`), ties keeping the chi-squared order.
+    `include` selects what each candidate carries: the full plaintext ("full"),
+    its first `preview_length` characters ("preview") or no text at all ("none").
+    Letter frequencies and words come from the `language` model.
+    """
+    return rank_shifts(text, text[:sample_size], top_k, include, preview_length, language)
 
-def caesar_attack(text: str) -> List[dict]:
+def rank_shifts(text: str, sample: Union[str, TextStats], top_k: int = DEFAULT_TOP_K, include: str = "full",
+                preview_length: int = DEFAULT_PREVIEW_LENGTH, language: str = DEFAULT_LANGUAGE) -> List[dict]:
+    """Rank shifts as caesar_attack() does, scoring `sample` (text or its counts) with chi-squared"""
     results = []
-    # Try all possible shifts (0-255)
-    for shift in range(256):
-        decrypted = caesar_decrypt(text, shift)
-        results.append({
+    pool = best_candidates(sample, caesar_decrypt, range(256), max(top_k, RERANK_POOL),
+                           get_model(language).letter_frequencies)
+    samples = [caesar_decrypt(text[:WORD_SAMPLE_SIZE], shift) for _, shift in pool]
+    for i, confidence in get_word_scorer(language).prefilter(samples, top_k):
+        score, shift = pool[i]
+        result = {
             "shift": shift,
-            "decrypted": decrypted,
+            "score": score_value(score),
+            "confidence": round(confidence, 3),
             "description": f"Shift value: {shift}"
-        })
+        }
+        if include == "full":
+            result["decrypted"] = caesar_decrypt(text, shift)
+        elif include == "preview":
+            result["decrypted"] = caesar_decrypt(text[:preview_length], shift)
+        results.append(result)
     return results
 
 # Monoalphabetic Cipher Implementation
 def create_substitution_key() -> Dict[str, str]:
-    """Create a random substitution key for printable characters"""
-    characters = list(string.printable)
-    shuffled = characters.copy()
-    random.shuffle(shuffled)
-    return dict(zip(characters, shuffled))
+    """Take a random substitution key for printable characters from the CSPRNG key pool"""
+    return key_pool.take()
 
 def monoalphabetic_encrypt(text: str) -> tuple[str, Dict[str, str]]:
     """Encrypt using random substitution"""
     key = create_substitution_key()
-    result = ''.join(key.get(char, char) for char in text)
+    result = substitute(text, key)
     return result, key
 
 def monoalphabetic_decrypt(text: str, key: Dict[str, str]) -> str:
     """Decrypt using provided substitution key"""
-    reverse_key = {v: k for k, v in key.items()}
-    return ''.join(reverse_key.get(char, char) for char in text)
+    return unsubstitute(text, key)
+
+# The key store, result cache and job store block on SQLite when it backs
+# them, so their calls then run on the thread pool like CPU work
+def store_call(func: Callable, *args, blocking: bool = True) -> Awaitable:
+    return run(func, *args, lane=THREAD if blocking else INLINE)
+
+async def get_compiled_key(key_id: str) -> CompiledKey:
+    """Look up a registered key, raising 404 when it is unknown or has expired"""
+    compiled = await store_call(key_store.get, key_id, blocking=key_store.shared)
+    if compiled is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired key ID: {key_id}")
+    return compiled
 
 def get_frequency_order(text: str) -> str:
     """Get the frequency order of letters in the text"""
-    text = ''.join(c.lower() for c in text if c.isalpha())
-    frequencies = Counter(text)
-    sorted_chars = sorted(frequencies.items(), key=lambda x: (-x[1], x[0]))
-    return ''.join(char for char, _ in sorted_chars)
+    return frequency_order(text)
 
-def monoalphabetic_attack(text: str) -> List[dict]:
-    """Perform cryptanalysis attack on monoalphabetic cipher text"""
+def monoalphabetic_attack(text: str, restarts: int = DEFAULT_RESTARTS, time_limit: float = DEFAULT_TIME_LIMIT,
+                          max_iterations: int = DEFAULT_MAX_ITERATIONS, seed: int = None,
+                          top_k: int = 1, language: str = DEFAULT_LANGUAGE) -> List[dict]:
+    """
+    Recover the substitution key with quadgram-scored hill climbing
+    The distinct keys the restarts end on are ranked by the dictionary-word
+    coverage of their plaintext (`confidence`), then by quadgram score.
+    """
+    solution = solve(text, string.printable, restarts=restarts, time_limit=time_limit,
+                     max_iterations=max_iterations, seed=seed, language=language)
+    return rank_keys(text, solution["candidates"], solution["iterations"], top_k, language)
+
+def rank_keys(text: str, solutions: List[tuple], iterations: int, top_k: int = 1,
+              language: str = DEFAULT_LANGUAGE) -> List[dict]:
+    """Rank (quadgram score, key) solutions as monoalphabetic_attack() does"""
+    frequencies = get_frequency_order(text)
+    # Solutions come best score first, which settles ties in confidence
+    solutions = sorted(solutions, key=lambda solution: -solution[0])
+    samples = [monoalphabetic_decrypt(text[:WORD_SAMPLE_SIZE], key) for _, key in solutions]
+    used = set(text)
     results = []
-    
-    # Add frequency analysis
-    cipher_freq = get_frequency_order(text)
-    results.append({
-        "description": "Letter frequencies in ciphertext",
-        "frequencies": cipher_freq,
-        "decrypted": text
-    })
-    
+    for rank, (i, confidence) in enumerate(get_word_scorer(language).prefilter(samples, top_k)):
+        score, key = solutions[i]
+        mapping = {cipher: plain for plain, cipher in key.items() if cipher in used}
+        results.append({
+            "description": "Best key found by hill climbing" if rank == 0 else f"Alternative key {rank}",
+            "frequencies": frequencies,
+            "score": round(score, 3),
+            "confidence": round(confidence, 3),
+            "iterations": iterations,
+            "key": key,
+            "mapping": dict(sorted(mapping.items())),
+            "decrypted": monoalphabetic_decrypt(text, key)
+        })
     return results
 
+def load_language(language: str) -> None:
+    """Load (or build from its corpus) a language's model and word scorer"""
+    get_model(language)
+    get_word_scorer(language)
+
+# Models are memory-mapped on first use; only the default language is warmed
+# up at startup, on the thread pool, and a model that cannot be loaded does not
+# stop the API from starting
+@app.on_event("startup")
+async def warm_default_language():
+    if DEFAULT_LANGUAGE not in available_languages():
+        return
+    try:
+        await run(load_language, DEFAULT_LANGUAGE, lane=THREAD, timeout=None)
+    except (OSError, ValueError) as e:
+        logging.getLogger(__name__).warning("Could not load the %s language model: %s", DEFAULT_LANGUAGE, e)
+
+def check_language(language: str) -> None:
+    """Reject languages without a model or corpus"""
+    if language not in available_languages():
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown language; available: {', '.join(available_languages())}")
+
+# Attack results are cached by a digest of the ciphertext and the attack
+# parameters; the digest doubles as the response's ETag, with a suffix for
+# media types other than JSON, and only cached results are revalidated
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+async def cached_attack(http_request: Request, kind: str, text: str, params: dict,
+                        compute: Callable[[], Awaitable[List[dict]]], deterministic: bool = True) -> Response:
+    """
+    Serve an attack result from the result cache, running `compute` on a miss
+    Results are cached as JSON and rendered in the negotiated media type.
+    If-None-Match gets 304 only when the result is cached under a matching
+    ETag. Results that differ between runs (`deterministic` False, such as a
+    solver without a seed) are neither cached nor tagged.
+    """
+    media_type = negotiate(http_request.headers.get("accept"), ATTACK_TYPES)
+    headers = {"Vary": "Accept"}
+    results = None
+    body = None
+    if deterministic:
+        key = await run(result_key, kind, text, params, lane=INLINE if choose_lane(len(text)) == INLINE else THREAD)
+        etag = f'"{key}"' if media_type == JSON else f'"{key}.{media_type.split("/")[1]}"'
+        body = await store_call(result_cache.get, key, blocking=result_cache.shared)
+        headers["X-Cache"] = "miss" if body is None else "hit"
+        if body is not None:
+            headers["ETag"] = etag
+            if etag_matches(http_request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+    if body is None:
+        results = await compute()
+        body = JSONResponse({"results": results}).body
+        if deterministic:
+            await store_call(result_cache.put, key, body, blocking=result_cache.shared)
+            headers["ETag"] = etag
+    if media_type == JSON:
+        return Response(body, media_type=JSON, headers=headers)
+    if results is None:
+        results = json.loads(body)["results"]
+    return render_results(results, media_type, headers)
+
 # API Endpoints
 @app.get("/")
 async def root():
     return {
         "message": "Welcome to the Cipher API",
         "endpoints": {
-            "caesar": ["/caesar/encrypt", "/caesar/decrypt", "/caesar/attack"],
-            "monoalphabetic": ["/monoalphabetic/encrypt", "/monoalphabetic/decrypt", "/monoalphabetic/attack"]
+            "caesar": ["/caesar/encrypt", "/caesar/decrypt", "/caesar/attack",
+                       "/caesar/encrypt/stream", "/caesar/decrypt/stream", "/caesar/attack/stream"],
+            "monoalphabetic": ["/monoalphabetic/keys", "/monoalphabetic/encrypt", "/monoalphabetic/decrypt",
+                               "/monoalphabetic/attack", "/monoalphabetic/decrypt/stream"],
+            "vigenere": ["/vigenere/encrypt", "/vigenere/decrypt", "/vigenere/attack"],
+            "batch": ["/batch"],
+            "jobs": ["/jobs", "/jobs/caesar", "/jobs/monoalphabetic", "/jobs/{job_id}", "/jobs/{job_id}/events"],
+            "cache": ["/cache/stats", "/cache"],
+            "metrics": ["/metrics"]
         }
     }
 
 # Caesar Cipher Endpoints
 @app.post("/caesar/encrypt")
-async def api_caesar_encrypt(request: CipherRequest):
+async def api_caesar_encrypt(request: CipherRequest, accept: Optional[str] = Header(None)):
     """Encrypt text using Caesar cipher"""
+    media_type = negotiate(accept, CIPHER_TYPES)
     if request.shift is None:
         raise HTTPException(status_code=400, detail="Shift value is required for Caesar cipher")
     if not 0 <= request.shift <= 255:
         raise HTTPException(status_code=400, detail="Shift must be between 0 and 255")
-    result = caesar_encrypt(request.text, request.shift)
+    result = await run(caesar_encrypt, request.text, request.shift, size=len(request.text))
+    if media_type != JSON:
+        return render_cipher(result, media_type)
     return {"result": result}
 
 @app.post("/caesar/decrypt")
-async def api_caesar_decrypt(request: CipherRequest):
+async def api_caesar_decrypt(request: CipherRequest, accept: Optional[str] = Header(None)):
     """Decrypt text using Caesar cipher"""
+    media_type = negotiate(accept, CIPHER_TYPES)
     if request.shift is None:
         raise HTTPException(status_code=400, detail="Shift value is required for Caesar cipher")
     if not 0 <= request.shift <= 255:
         raise HTTPException(status_code=400, detail="Shift must be between 0 and 255")
-    result = caesar_decrypt(request.text, request.shift)
+    result = await run(caesar_decrypt, request.text, request.shift, size=len(request.text))
+    if media_type != JSON:
+        return render_cipher(result, media_type)
     return {"result": result}
 
 @app.post("/caesar/attack", response_model=AttackResponse)
-async def api_caesar_attack(request: CipherRequest):
+async def api_caesar_attack(request: AttackRequest, http_request: Request):
     """Perform brute force attack on Caesar cipher text"""
-    results = caesar_attack(request.text)
+    if not 1 <= request.top_k <= 256:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 256")
+    if request.sample_size < 1:
+        raise HTTPException(status_code=400, detail="sample_size must be positive")
+    if request.preview_length < 0:
+        raise HTTPException(status_code=400, detail="preview_length must not be negative")
+    check_language(request.language)
+    params = request.model_dump(exclude={"text"})
+    compute = partial(run, caesar_attack, request.text, request.top_k, request.sample_size,
+                      request.include, request.preview_length, request.language,
+                      lane=choose_lane(len(request.text), attack=True))
+    return await cached_attack(http_request, "caesar", request.text, params, compute)
+
+# Streaming Caesar Endpoints: the raw request body is the text, the response
+# is the transformed text, both processed in fixed-size chunks
+@app.post("/caesar/encrypt/stream")
+async def api_caesar_encrypt_stream(request: Request, shift: int):
+    """Encrypt a streamed UTF-8 body using Caesar cipher"""
+    if not 0 <= shift <= 255:
+        raise HTTPException(status_code=400, detail="Shift must be between 0 and 255")
+    return TransformStreamingResponse(request, partial(caesar_encrypt, shift=shift))
+
+@app.post("/caesar/decrypt/stream")
+async def api_caesar_decrypt_stream(request: Request, shift: int):
+    """Decrypt a streamed UTF-8 body using Caesar cipher"""
+    if not 0 <= shift <= 255:
+        raise HTTPException(status_code=400, detail="Shift must be between 0 and 255")
+    return TransformStreamingResponse(request, partial(caesar_decrypt, shift=shift))
+
+@app.post("/caesar/attack/stream", response_model=AttackResponse)
+async def api_caesar_attack_stream(request: Request, top_k: int = DEFAULT_TOP_K, language: str = DEFAULT_LANGUAGE,
+                                   accept: Optional[str] = Header(None)):
+    """
+    Rank Caesar shifts for a streamed UTF-8 body
+    The body is reduced to character counts chunk by chunk and never held in
+    memory as a whole, so candidates carry no decrypted text.
+    """
+    media_type = negotiate(accept, ATTACK_TYPES)
+    if not 1 <= top_k <= 256:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 256")
+    check_language(language)
+    stats = TextStats(order=1)
+    async for text in decode_stream(request.stream()):
+        stats.update(text)
+    candidates = best_candidates(stats, caesar_decrypt, range(256), top_k, get_model(language).letter_frequencies)
+    results = [{"shift": shift, "score": score_value(score), "description": f"Shift value: {shift}"}
+               for score, shift in candidates]
+    if media_type != JSON:
+        return render_results(results, media_type)
     return AttackResponse(results=results)
 
 # Monoalphabetic Cipher Endpoints
+def cipher_response(response: CipherResponse, media_type: str):
+    """Return the response as is for JSON, or rendered in the negotiated media type"""
+    if media_type == JSON:
+        return response
+    return render_cipher(response.result, media_type, key=response.key, key_id=response.key_id)
+
+# Keys registered here are compiled once and kept server-side, so later
+# encrypt/decrypt calls can send the short key ID instead of the whole key
+@app.post("/monoalphabetic/keys", response_model=KeyResponse)
+async def api_monoalphabetic_register_key(request: KeyRequest):
+    """Register a substitution key (or a random one) and return its key ID"""
+    key = request.key or create_substitution_key()
+    try:
+        key_id = await store_call(key_store.register, key, blocking=key_store.shared)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return KeyResponse(key_id=key_id, key=key)
+
+@app.delete("/monoalphabetic/keys/{key_id}")
+async def api_monoalphabetic_delete_key(key_id: str):
+    """Forget a registered key"""
+    if not await store_call(key_store.delete, key_id, blocking=key_store.shared):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired key ID: {key_id}")
+    return {"deleted": key_id}
+
 @app.post("/monoalphabetic/encrypt", response_model=CipherResponse)
-async def api_monoalphabetic_encrypt(request: CipherRequest):
+async def api_monoalphabetic_encrypt(request: CipherRequest, accept: Optional[str] = Header(None)):
     """Encrypt text using monoalphabetic substitution cipher"""
-    result, key = monoalphabetic_encrypt(request.text)
+    media_type = negotiate(accept, CIPHER_TYPES)
+    if request.key_id:
+        compiled = await get_compiled_key(request.key_id)
+        result = await run(compiled.encrypt, request.text, size=len(request.text))
+        return cipher_response(CipherResponse(result=result, key_id=request.key_id), media_type)
+    result, key = await run(monoalphabetic_encrypt, request.text, size=len(request.text))
     key = {str(k): str(v) for k, v in key.items()}
-    return CipherResponse(result=result, key=key)
+    # Register the generated key so the text can be decrypted by ID
+    key_id = await store_call(key_store.register, key, blocking=key_store.shared)
+    return cipher_response(CipherResponse(result=result, key=key, key_id=key_id), media_type)
 
 @app.post("/monoalphabetic/decrypt", response_model=CipherResponse)
-async def api_monoalphabetic_decrypt(request: DecryptRequest):
+async def api_monoalphabetic_decrypt(request: DecryptRequest, accept: Optional[str] = Header(None)):
     """Decrypt text using monoalphabetic substitution cipher"""
+    media_type = negotiate(accept, CIPHER_TYPES)
+    if request.key_id:
+        compiled = await get_compiled_key(request.key_id)
+        result = await run(compiled.decrypt, request.text, size=len(request.text))
+        return cipher_response(CipherResponse(result=result, key_id=request.key_id), media_type)
     if not request.key:
-        raise HTTPException(status_code=400, detail="Key is required for monoalphabetic decryption")
+        raise HTTPException(status_code=400, detail="Key or key_id is required for monoalphabetic decryption")
     key = {str(k): str(v) for k, v in request.key.items()}
-    result = monoalphabetic_decrypt(request.text, key)
-    return CipherResponse(result=result, key=key)
+    result = await run(monoalphabetic_decrypt, request.text, key, size=len(request.text))
+    return cipher_response(CipherResponse(result=result, key=key), media_type)
+
+@app.post("/monoalphabetic/decrypt/stream")
+async def api_monoalphabetic_decrypt_stream(request: Request, key: Optional[str] = None, key_id: Optional[str] = None):
+    """Decrypt a streamed UTF-8 body; pass `key_id`, or `key` as a JSON object"""
+    if key_id:
+        return TransformStreamingResponse(request, (await get_compiled_key(key_id)).decrypt)
+    try:
+        key = json.loads(key or "null")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Key must be a JSON object")
+    if not key or not isinstance(key, dict) or not all(isinstance(v, str) for v in key.values()):
+        raise HTTPException(status_code=400, detail="Key or key_id is required for monoalphabetic decryption")
+    return TransformStreamingResponse(request, partial(monoalphabetic_decrypt, key=key))
+
+def check_monoalphabetic_attack(request: MonoalphabeticAttackRequest, max_time_limit: float) -> None:
+    """Validate the solver parameters of an attack request"""
+    if not 1 <= request.restarts <= MAX_RESTARTS:
+        raise HTTPException(status_code=400, detail=f"restarts must be between 1 and {MAX_RESTARTS}")
+    if not 0 < request.time_limit <= max_time_limit:
+        raise HTTPException(status_code=400, detail=f"time_limit must be between 0 and {max_time_limit} seconds")
+    if request.max_iterations < 1:
+        raise HTTPException(status_code=400, detail="max_iterations must be positive")
+    if not 1 <= request.top_k <= request.restarts:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and restarts")
+    check_language(request.language)
 
 @app.post("/monoalphabetic/attack", response_model=AttackResponse)
-async def api_monoalphabetic_attack(request: CipherRequest):
+async def api_monoalphabetic_attack(request: MonoalphabeticAttackRequest, http_request: Request):
     """Perform cryptanalysis attack on monoalphabetic cipher text"""
-    results = monoalphabetic_attack(request.text)
-    return AttackResponse(results=results)
+    check_monoalphabetic_attack(request, MAX_TIME_LIMIT)
+    # The solver spreads its restarts over the process pool itself, so it only
+    # needs a thread to wait in
+    params = request.model_dump(exclude={"text"})
+    compute = partial(run, monoalphabetic_attack, request.text, request.restarts, request.time_limit,
+                      request.max_iterations, request.seed, request.top_k, request.language, lane=THREAD,
+                      timeout=request.time_limit + SOLVER_TIMEOUT_MARGIN)
+    return await cached_attack(http_request, "monoalphabetic", request.text, params, compute,
+                               deterministic=request.seed is not None)
+
+# Vigenère Cipher Endpoints: Vigenère, Beaufort and autokey variants
+def check_vigenere_key(key: str) -> None:
+    try:
+        key_shifts(key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/vigenere/encrypt")
+async def api_vigenere_encrypt(request: VigenereRequest, accept: Optional[str] = Header(None)):
+    """Encrypt text using a Vigenère-family cipher"""
+    media_type = negotiate(accept, CIPHER_TYPES)
+    check_vigenere_key(request.key)
+    result = await run(polyalphabetic_encrypt, request.text, request.key, request.variant, size=len(request.text))
+    if media_type != JSON:
+        return render_cipher(result, media_type)
+    return {"result": result}
+
+@app.post("/vigenere/decrypt")
+async def api_vigenere_decrypt(request: VigenereRequest, accept: Optional[str] = Header(None)):
+    """Decrypt text using a Vigenère-family cipher"""
+    media_type = negotiate(accept, CIPHER_TYPES)
+    check_vigenere_key(request.key)
+    result = await run(polyalphabetic_decrypt, request.text, request.key, request.variant, size=len(request.text))
+    if media_type != JSON:
+        return render_cipher(result, media_type)
+    return {"result": result}
+
+@app.post("/vigenere/attack", response_model=AttackResponse)
+async def api_vigenere_attack(request: VigenereAttackRequest, http_request: Request):
+    """Recover a Vigenère or Beaufort key with Kasiski examination and index of coincidence"""
+    if not 1 <= request.max_key_length <= MAX_VIGENERE_KEY_LENGTH:
+        raise HTTPException(status_code=400,
+                            detail=f"max_key_length must be between 1 and {MAX_VIGENERE_KEY_LENGTH}")
+    if not 1 <= request.lengths <= request.max_key_length:
+        raise HTTPException(status_code=400, detail="lengths must be between 1 and max_key_length")
+    if request.preview_length < 0:
+        raise HTTPException(status_code=400, detail="preview_length must not be negative")
+    check_language(request.language)
+    params = request.model_dump(exclude={"text"})
+    compute = partial(run, vigenere_attack, request.text, request.variant, request.max_key_length,
+                      request.lengths, request.include, request.preview_length, request.language,
+                      lane=choose_lane(len(request.text), attack=True))
+    return await cached_attack(http_request, "vigenere", request.text, params, compute)
+
+# Batch Endpoint
+@app.post("/batch")
+async def api_batch(request: BatchRequest, accept: Optional[str] = Header(None)):
+    """Run many encrypt/decrypt operations in one request, returning results in input order"""
+    media_type = NDJSON if request.format == "ndjson" else negotiate(accept, (JSON, NDJSON, MSGPACK))
+    if len(request.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch holds at most {MAX_BATCH_ITEMS} items")
+    items = []
+    generated_keys = {}
+    key_ids = {item.key_id for item in request.items if item.key_id and not item.op.startswith("caesar")}
+    compiled_keys = await store_call(lambda: {key_id: key_store.get(key_id) for key_id in key_ids},
+                                     blocking=key_store.shared and bool(key_ids))
+    for index, item in enumerate(request.items):
+        key = item.key
+        if item.key_id and not item.op.startswith("caesar"):
+            compiled = compiled_keys[item.key_id]
+            if compiled is None:
+                raise HTTPException(status_code=404, detail=f"Item {index}: unknown or expired key ID: {item.key_id}")
+            key = compiled.key
+        if item.op.startswith("caesar"):
+            if item.shift is None:
+                raise HTTPException(status_code=400, detail=f"Item {index}: shift value is required for Caesar cipher")
+            if not 0 <= item.shift <= 255:
+                raise HTTPException(status_code=400, detail=f"Item {index}: shift must be between 0 and 255")
+        elif item.op == "monoalphabetic_encrypt" and not key:
+            generated_keys[index] = None
+        elif not key:
+            raise HTTPException(status_code=400, detail=f"Item {index}: key is required for monoalphabetic decryption")
+        items.append((item.op, item.text, item.shift, key))
+    # Random keys are drawn from the pool in one go
+    for index, key in zip(list(generated_keys), key_pool.take_many(len(generated_keys))):
+        generated_keys[index] = key
+        items[index] = items[index][:3] + (key,)
+
+    # run_batch hands large batches to the process pool itself
+    size = sum(len(item[1]) for item in items)
+    outputs = await run(run_batch, items, lane=INLINE if choose_lane(size) == INLINE else THREAD)
+    results = []
+    for index, output in enumerate(outputs):
+        result = {"result": output}
+        if index in generated_keys:
+            result["key"] = generated_keys[index]
+        results.append(result)
+
+    if media_type == NDJSON:
+        lines = (json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+        return StreamingResponse(lines, media_type=NDJSON)
+    if media_type == MSGPACK:
+        return render_content({"results": results}, MSGPACK)
+    return {"results": results}
+
+# Attack Job Endpoints: long attacks run in the background, checkpointed to
+# the job store, and are polled or streamed for progress
+job_store = JobStore()
+job_scheduler = JobScheduler(job_store, {"caesar": CaesarJob(rank_shifts),
+                                         "monoalphabetic": MonoalphabeticJob(rank_keys)})
+
+@app.on_event("startup")
+async def start_job_scheduler():
+    job_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_job_scheduler():
+    await job_scheduler.stop()
+
+def job_client(request: Request) -> str:
+    """Client a job is counted against: the peer address, which clients cannot choose"""
+    return request.client.host if request.client else "unknown"
+
+async def get_job(job_id: str) -> dict:
+    """Look up a job, raising 404 when it is unknown or has been purged"""
+    job = await store_call(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job ID: {job_id}")
+    return job
+
+@app.post("/jobs/caesar", response_model=JobResponse, status_code=202)
+async def api_caesar_job(request: CaesarJobRequest, http_request: Request):
+    """Queue a Caesar brute force over the whole text"""
+    if not 1 <= request.top_k <= 256:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 256")
+    if request.preview_length < 0:
+        raise HTTPException(status_code=400, detail="preview_length must not be negative")
+    check_language(request.language)
+    job_id = await store_call(job_store.create, "caesar", job_client(http_request), request.text,
+                              request.model_dump(exclude={"text"}))
+    return JobResponse(job_id=job_id, status="queued")
+
+@app.post("/jobs/monoalphabetic", response_model=JobResponse, status_code=202)
+async def api_monoalphabetic_job(request: MonoalphabeticAttackRequest, http_request: Request):
+    """Queue a monoalphabetic hill-climbing attack with up to MAX_JOB_TIME_LIMIT seconds of search"""
+    check_monoalphabetic_attack(request, MAX_JOB_TIME_LIMIT)
+    job_id = await store_call(job_store.create, "monoalphabetic", job_client(http_request), request.text,
+                              request.model_dump(exclude={"text"}))
+    return JobResponse(job_id=job_id, status="queued")
+
+@app.get("/jobs")
+async def api_list_jobs(http_request: Request):
+    """The calling client's jobs, newest first"""
+    return {"jobs": await store_call(job_store.list, job_client(http_request))}
+
+@app.get("/jobs/{job_id}")
+async def api_get_job(job_id: str):
+    """Status, progress and best candidate so far of a job; results once it has completed"""
+    return await get_job(job_id)
+
+@app.get("/jobs/{job_id}/events")
+async def api_job_events(job_id: str):
+    """
+    Stream a job's progress as NDJSON
+    A line is sent whenever the job checkpoints; the stream ends with the line
+    reporting the job finished.
+    """
+    job = await get_job(job_id)
+
+    async def events():
+        current = job
+        yield json.dumps(current, ensure_ascii=False) + "\n"
+        while current["status"] not in FINISHED:
+            await asyncio.sleep(POLL_INTERVAL)
+            try:
+                latest = await store_call(job_store.get, job_id)
+            except ExecutorBusy:
+                continue
+            if latest is None:
+                return
+            if latest["updated"] != current["updated"]:
+                current = latest
+                yield json.dumps(current, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(events(), media_type=NDJSON)
+
+@app.delete("/jobs/{job_id}")
+async def api_cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    await get_job(job_id)
+    if not await store_call(job_store.cancel, job_id):
+        raise HTTPException(status_code=409, detail="Job has already finished")
+    return await get_job(job_id)
+
+# Metrics Endpoint
+@app.get("/metrics")
+async def api_metrics():
+    """Request metrics in the Prometheus text format"""
+    cache = result_cache.info()
+    extra = {
+        "cipher_executor_queue_depth": ("gauge", "Tasks queued or running per pool",
+                                        {(("lane", lane),): depth for lane, depth in queue_depth().items()}),
+        "cipher_result_cache_events_total": ("counter", "Attack result cache lookups and stores",
+                                             {(("event", event),): cache[event] for event in
+                                              ("memory_hits", "disk_hits", "misses", "stores", "evictions")}),
+        "cipher_result_cache_memory_bytes": ("gauge", "Bytes held by the result cache memory tier",
+                                             {(): cache["memory_bytes"]}),
+        "cipher_key_store_keys": ("gauge", "Registered substitution keys",
+                                  {(): await store_call(len, key_store, blocking=key_store.shared)}),
+        "cipher_jobs": ("gauge", "Attack jobs per status",
+                        {(("status", status),): count
+                         for status, count in (await store_call(job_store.counts)).items()}),
+    }
+    return Response(render_metrics(extra), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Result Cache Endpoints
+@app.get("/cache/stats")
+async def api_cache_stats():
+    """Hit/miss counters and memory use of the attack result cache"""
+    return result_cache.info()
+
+@app.delete("/cache")
+async def api_cache_clear():
+    """Drop every cached attack result"""
+    await store_call(result_cache.clear, blocking=result_cache.shared)
+    return {"cleared": True}
 
 if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Serve the Cipher API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("CIPHER_WORKERS", 1)),
+                        help="Worker processes; above 1 they share keys and attack results through SQLite")
+    parser.add_argument("--state-dir", default=os.path.join(tempfile.gettempdir(), "cipher-api"),
+                        help="Directory for the shared key, result and job databases")
+    args = parser.parse_args()
+    os.environ.setdefault("CIPHER_JOB_STORE_PATH", os.path.join(args.state_dir, "jobs.db"))
+
+    if args.workers > 1:
+        # Workers import the app afresh and configure themselves from the
+        # environment; explicitly set paths and pool sizes are kept
+        os.makedirs(args.state_dir, exist_ok=True)
+        os.environ.setdefault("CIPHER_KEY_STORE_PATH", os.path.join(args.state_dir, "keys.db"))
+        os.environ.setdefault("CIPHER_RESULT_CACHE_PATH", os.path.join(args.state_dir, "results.db"))
+        os.environ.setdefault("CIPHER_PROCESS_WORKERS", str(max(1, (os.cpu_count() or 1) // args.workers)))
+        uvicorn.run("app:app", host=args.host, port=args.port, workers=args.workers,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        job_store.path = os.environ["CIPHER_JOB_STORE_PATH"]
+        uvicorn.run(app, host=args.host, port=args.port) 
\ No newline at end of file
@@ -0,0 +1,137 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import random
+import string
+import time
+import numpy as np
+
+from executor import map_process, MAX_QUEUE_DEPTH, PROCESS_WORKERS
+from substitution_solver import KeyScorer, climb, start_keys, DEFAULT_SAMPLE_SIZE
+from text_stats import TextStats
+
+# Characters counted per Caesar step before the deadline is checked again
+CHUNK_SIZE = 1024 * 1024
+
+
+class CaesarJob:
+    """
+    Caesar brute force over the whole ciphertext
+    The character counts are gathered chunk by chunk and checkpointed, so a
+    job over a very long text resumes where it stopped; the best shift so far
+    is ranked on the counts gathered up to the checkpoint.
+    Parameters:
+        rank (Callable): rank_shifts() of the API, ranking shifts from counts
+    """
+
+    def __init__(self, rank: Callable[..., List[dict]]):
+        self.rank = rank
+
+    def start(self, text: str, params: dict) -> dict:
+        return {"offset": 0, "length": len(text), "total": 0, "unigrams": [0] * 256}
+
+    def step(self, text: str, params: dict, state: dict, deadline: float) -> dict:
+        stats = self._stats(state)
+        offset = state["offset"]
+        while offset < len(text) and time.time() < deadline:
+            stats.update(text[offset:offset + CHUNK_SIZE])
+            offset += CHUNK_SIZE
+        return dict(state, offset=min(offset, len(text)), total=stats.total, unigrams=stats.unigrams.tolist())
+
+    def done(self, params: dict, state: dict) -> bool:
+        return state["offset"] >= state["length"]
+
+    def report(self, text: str, params: dict, state: dict) -> Tuple[float, Optional[dict]]:
+        progress = state["offset"] / state["length"] if state["length"] else 1.0
+        results = self.rank(text, self._stats(state), 1, "none", 0, params["language"])
+        return progress, results[0] if results else None
+
+    def finish(self, text: str, params: dict, state: dict) -> List[dict]:
+        return self.rank(text, self._stats(state), params["top_k"], params["include"],
+                         params["preview_length"], params["language"])
+
+    @staticmethod
+    def _stats(state: dict) -> TextStats:
+        stats = TextStats(order=1)
+        stats.total = state["total"]
+        stats.unigrams = np.array(state["unigrams"], dtype=np.int64)
+        return stats
+
+
+def climb_step(sample: str, alphabet: str, start: List[int], seed: int, deadline: float,
+               max_iterations: int, language: str) -> Tuple[float, List[int], int, bool]:
+    """climb() for one job step, also telling whether the climb converged before the deadline"""
+    score, key, iterations = climb(sample, alphabet, start, seed, deadline, max_iterations, language)
+    return score, key, iterations, time.time() < deadline
+
+
+class MonoalphabeticJob:
+    """
+    Hill climbing with random restarts, as substitution_solver.solve(), in steps
+    Every step continues up to one unfinished restart per process pool worker
+    (no more than the pool's queue depth) from the key it last reached; restarts take turns, so those beyond the
+    pool size are not left waiting past the step deadline. The checkpoint
+    keeps each restart's key, score and evaluations used. A restart is finished once it converges or uses
+    its share of `max_iterations`, the job once every restart has finished or
+    `time_limit` seconds of climbing have passed.
+    Parameters:
+        rank (Callable): rank_keys() of the API, ranking the restarts' keys
+        alphabet (str): Characters the substitution permutes
+    """
+
+    def __init__(self, rank: Callable[..., List[dict]], alphabet: str = string.printable):
+        self.rank = rank
+        self.alphabet = alphabet
+
+    def start(self, text: str, params: dict) -> dict:
+        rng = random.Random(params["seed"])
+        scorer = KeyScorer(text[:DEFAULT_SAMPLE_SIZE], self.alphabet, params["language"])
+        # Without a character of the alphabet in the sample there is no key to find
+        restarts = [{"key": key, "score": scorer.score(key), "iterations": 0, "done": False}
+                    for key in start_keys(scorer, self.alphabet, params["restarts"], rng)] if scorer.used else []
+        return {"restarts": restarts, "seed": rng.getrandbits(32), "steps": 0, "elapsed": 0.0}
+
+    def step(self, text: str, params: dict, state: dict, deadline: float) -> dict:
+        started = time.time()
+        deadline = min(deadline, started + params["time_limit"] - state["elapsed"])
+        budget = max(params["max_iterations"] // params["restarts"], 1)
+        restarts = [dict(restart) for restart in state["restarts"]]
+        pending = [i for i, restart in enumerate(restarts) if not restart["done"]]
+        width = min(PROCESS_WORKERS, MAX_QUEUE_DEPTH)
+        turn = state["steps"] * width % len(pending)
+        pending = (pending[turn:] + pending[:turn])[:width]
+        jobs = [(text[:DEFAULT_SAMPLE_SIZE], self.alphabet, restarts[i]["key"],
+                 (state["seed"] + state["steps"] * len(restarts) + i) % 2 ** 32, deadline,
+                 budget - restarts[i]["iterations"], params["language"]) for i in pending]
+        outcomes = map_process(climb_step, *zip(*jobs), timeout=None)
+        for i, (score, key, iterations, converged) in zip(pending, outcomes):
+            restart = restarts[i]
+            restart.update(key=key, score=score, iterations=restart["iterations"] + iterations)
+            restart["done"] = converged or restart["iterations"] >= budget
+        return dict(state, restarts=restarts, steps=state["steps"] + 1,
+                    elapsed=state["elapsed"] + time.time() - started)
+
+    def done(self, params: dict, state: dict) -> bool:
+        return state["elapsed"] >= params["time_limit"] or all(restart["done"] for restart in state["restarts"])
+
+    def report(self, text: str, params: dict, state: dict) -> Tuple[float, Optional[dict]]:
+        restarts = state["restarts"]
+        if not restarts:
+            return 1.0, None
+        iterations = sum(restart["iterations"] for restart in restarts)
+        finished = sum(restart["done"] for restart in restarts) / len(restarts)
+        progress = min(max(state["elapsed"] / params["time_limit"], iterations / params["max_iterations"],
+                           finished), 1.0)
+        best = max(restarts, key=lambda restart: restart["score"])
+        return progress, {"score": round(best["score"], 3), "iterations": iterations,
+                          "key": self._encryption_key(best["key"])}
+
+    def finish(self, text: str, params: dict, state: dict) -> List[dict]:
+        candidates = {}
+        for restart in sorted(state["restarts"], key=lambda restart: -restart["score"]):
+            candidates.setdefault(tuple(restart["key"]), restart["score"])
+        solutions = [(score, self._encryption_key(key)) for key, score in candidates.items()]
+        iterations = sum(restart["iterations"] for restart in state["restarts"])
+        return self.rank(text, solutions, iterations, params["top_k"], params["language"])
+
+    def _encryption_key(self, key: List[int]) -> Dict[str, str]:
+        # Solver keys give the plaintext code per alphabet position
+        return {chr(code): self.alphabet[i] for i, code in enumerate(key)}
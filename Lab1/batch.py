@@ -0,0 +1,92 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from functools import partial
+
+from executor import map_process, PROCESS_WORKERS
+from cipher_core import caesar_ascii_encrypt, caesar_ascii_decrypt, substitution_transform
+
+# Batches with fewer characters than this run inline; larger ones are spread
+# over a process pool in slices of about SLICE_CHARS characters
+POOL_MIN_CHARS = 1_000_000
+SLICE_CHARS = 256 * 1024
+
+# One batch item: (op, text, shift, key)
+BatchItem = Tuple[str, str, Optional[int], Optional[Dict[str, str]]]
+
+
+def compile_op(op: str, shift: Optional[int], key: Optional[Dict[str, str]]) -> Callable[[str], str]:
+    """Return the transform for an operation, with its translation table compiled once"""
+    if op == "caesar_encrypt":
+        return partial(caesar_ascii_encrypt, shift=shift)
+    if op == "caesar_decrypt":
+        return partial(caesar_ascii_decrypt, shift=shift)
+    if op == "monoalphabetic_encrypt":
+        return substitution_transform(key)
+    if op == "monoalphabetic_decrypt":
+        return substitution_transform(key, inverse=True)
+    raise ValueError(f"Unknown batch operation: {op}")
+
+
+def run_group(op: str, shift: Optional[int], key: Optional[Dict[str, str]], texts: List[str]) -> List[str]:
+    """Apply one operation and key to many texts"""
+    transform = compile_op(op, shift, key)
+    return [transform(text) for text in texts]
+
+
+def group_items(items: List[BatchItem]) -> Dict[tuple, List[int]]:
+    """
+    Group item positions by operation and key
+    Returns:
+        Dict[tuple, List[int]]: (op, shift, key items) -> positions in `items`
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for index, (op, _, shift, key) in enumerate(items):
+        group = (op, shift, tuple(key.items()) if key else None)
+        groups.setdefault(group, []).append(index)
+    return groups
+
+
+def _slices(positions: List[int], items: List[BatchItem]) -> List[List[int]]:
+    """Split a group into runs of about SLICE_CHARS characters"""
+    slices = [[]]
+    size = 0
+    for index in positions:
+        if size >= SLICE_CHARS:
+            slices.append([])
+            size = 0
+        slices[-1].append(index)
+        size += len(items[index][1])
+    return slices
+
+
+def run_batch(items: List[BatchItem], inline: bool = False) -> List[str]:
+    """
+    Run many cipher operations, compiling each distinct key only once
+    Parameters:
+        items (List[BatchItem]): (op, text, shift, key) tuples
+        inline (bool): Never use the process pool, even for large batches
+    Returns:
+        List[str]: Results in input order
+    """
+    results: List[Optional[str]] = [None] * len(items)
+    groups = group_items(items)
+    total_chars = sum(len(item[1]) for item in items)
+
+    if inline or total_chars < POOL_MIN_CHARS:
+        for positions in groups.values():
+            op, _, shift, key = items[positions[0]]
+            outputs = run_group(op, shift, key, [items[i][1] for i in positions])
+            for index, output in zip(positions, outputs):
+                results[index] = output
+        return results
+
+    # Slices go through the executor's accounting, a few per worker at a time
+    parts, calls = [], []
+    for positions in groups.values():
+        op, _, shift, key = items[positions[0]]
+        for part in _slices(positions, items):
+            parts.append(part)
+            calls.append((op, shift, key, [items[i][1] for i in part]))
+    for part, outputs in zip(parts, map_process(run_group, *zip(*calls), window=2 * PROCESS_WORKERS)):
+        for index, output in zip(part, outputs):
+            results[index] = output
+    return results
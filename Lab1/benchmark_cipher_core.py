@@ -0,0 +1,93 @@
+import argparse
+import random
+import string
+import time
+from typing import Callable, Dict, List
+
+from cipher_core import caesar_ascii_encrypt, caesar_alpha_encrypt, substitute
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000]
+
+
+def loop_caesar_ascii(text: str, shift: int) -> str:
+    """Reference implementation: the original per-character loop from app.py"""
+    result = ""
+    for char in text:
+        if char.isascii():
+            result += chr((ord(char) + shift) % 256)
+        else:
+            result += char
+    return result
+
+
+def loop_caesar_alpha(text: str, shift: int) -> str:
+    """Reference implementation: the original loop from caesar_encryption.py"""
+    result = ""
+    for char in text:
+        if char.isalpha():
+            base = ord('A') if char.isupper() else ord('a')
+            result += chr(((ord(char) - base + shift % 26) % 26) + base)
+        else:
+            result += char
+    return result
+
+
+def loop_substitute(text: str, key: Dict[str, str]) -> str:
+    """Reference implementation: the original loop from monoalphabetic_encryption.py"""
+    result = ""
+    for char in text:
+        result += key.get(char, char)
+    return result
+
+
+def time_call(func: Callable[[], str], repeat: int) -> float:
+    """Return the best wall-clock time of `repeat` runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes: List[int], loop_limit: int, repeat: int) -> None:
+    characters = list(string.printable)
+    shuffled = characters.copy()
+    random.shuffle(shuffled)
+    key = dict(zip(characters, shuffled))
+
+    cases = [
+        ("caesar (mod 256)", lambda t: loop_caesar_ascii(t, 3), lambda t: caesar_ascii_encrypt(t, 3)),
+        ("caesar (letters)", lambda t: loop_caesar_alpha(t, 3), lambda t: caesar_alpha_encrypt(t, 3)),
+        ("substitution", lambda t: loop_substitute(t, key), lambda t: substitute(t, key)),
+    ]
+
+    print(f"{'Transform':<18} {'Size':>12} {'Loop MB/s':>12} {'Table MB/s':>12} {'Speedup':>9}")
+    print("-" * 67)
+    for name, loop_func, table_func in cases:
+        for size in sizes:
+            text = ''.join(random.choices(string.printable, k=min(size, 1_000_000)))
+            text = (text * (size // len(text) + 1))[:size]
+            mb = size / 1_000_000
+
+            table_time = time_call(lambda: table_func(text), repeat)
+            if size <= loop_limit:
+                loop_time = time_call(lambda: loop_func(text), repeat)
+                loop_rate = f"{mb / loop_time:12.1f}"
+                speedup = f"{loop_time / table_time:8.1f}x"
+            else:
+                loop_rate = f"{'skipped':>12}"
+                speedup = f"{'-':>9}"
+            print(f"{name:<18} {size:>12,} {loop_rate} {mb / table_time:12.1f} {speedup}")
+        print("-" * 67)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare translation-table transforms against per-character loops")
+    parser.add_argument("--max-size", type=int, default=SIZES[-1], help="Largest input size in characters")
+    parser.add_argument("--loop-limit", type=int, default=10_000_000,
+                        help="Skip the slow loop implementations above this size")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    run([size for size in SIZES if size <= args.max_size], args.loop_limit, args.repeat)
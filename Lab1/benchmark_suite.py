@@ -0,0 +1,265 @@
+import argparse
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from cipher_core import (caesar_ascii_encrypt, caesar_ascii_decrypt, caesar_alpha_encrypt, substitute,
+                         unsubstitute, caesar_bytes_encrypt, substitute_bytes)
+from polyalphabetic import vigenere_encrypt
+from language_model import CORPUS_PATH
+
+# Input sizes in characters (or bytes) for the transform benchmarks
+TRANSFORM_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+
+# Ciphertext lengths for the attack benchmarks
+CAESAR_ATTACK_LENGTHS = [100, 1_000, 10_000, 100_000, 1_000_000]
+MONOALPHABETIC_ATTACK_LENGTHS = [200, 1_000, 5_000, 20_000]
+
+# Fixed solver budget, so attack timings measure work rather than the time limit
+SOLVER_RESTARTS = 2
+SOLVER_ITERATIONS = 5_000
+
+# Requests sent per endpoint benchmark
+ENDPOINT_REQUESTS = 50
+
+# Fast calls are repeated until one sample takes at least this long
+MIN_SAMPLE_SECONDS = 0.02
+
+# Relative slowdown against the baseline reported as a regression
+DEFAULT_THRESHOLD = 0.25
+
+GROUPS = ("transform", "attack", "endpoint")
+
+
+def english_text(size: int) -> str:
+    """The first `size` characters of the English corpus, repeated as needed"""
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = f.read()
+    return (corpus * (size // len(corpus) + 1))[:size]
+
+
+def random_key(alphabet: str, rng: random.Random) -> Dict[str, str]:
+    shuffled = list(alphabet)
+    rng.shuffle(shuffled)
+    return dict(zip(alphabet, shuffled))
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    """
+    Return the best wall-clock time per call over `repeat` samples
+    Calls faster than MIN_SAMPLE_SECONDS are batched so that timer resolution
+    and scheduling noise do not dominate the measurement.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SAMPLE_SECONDS:
+            break
+        number *= 10
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def bench_transforms(sizes: List[int], repeat: int, rng: random.Random) -> Dict[str, dict]:
+    """Throughput of every transform for each input size and key type"""
+    latin1 = ''.join(chr(i) for i in range(256))
+    printable_key = random_key(string.printable, rng)
+    latin1_key = random_key(latin1, rng)
+    # Mapping into Greek letters forces the str.translate path
+    wide_key = dict(zip(string.ascii_lowercase, (chr(0x3b1 + i) for i in range(26))))
+
+    cases = [
+        ("caesar_ascii_encrypt", False, lambda data: caesar_ascii_encrypt(data, 3)),
+        ("caesar_ascii_decrypt", False, lambda data: caesar_ascii_decrypt(data, 3)),
+        ("caesar_alpha_encrypt", False, lambda data: caesar_alpha_encrypt(data, 3)),
+        ("vigenere_encrypt", False, lambda data: vigenere_encrypt(data, "CRYPTOGRAPHY")),
+        ("substitute/printable_key", False, lambda data: substitute(data, printable_key)),
+        ("substitute/latin1_key", False, lambda data: substitute(data, latin1_key)),
+        ("substitute/wide_key", False, lambda data: substitute(data, wide_key)),
+        ("unsubstitute/printable_key", False, lambda data: unsubstitute(data, printable_key)),
+        ("caesar_bytes_encrypt", True, lambda data: caesar_bytes_encrypt(data, 3)),
+        ("substitute_bytes/latin1_key", True, lambda data: substitute_bytes(data, latin1_key)),
+    ]
+
+    results = {}
+    for size in sizes:
+        text = english_text(size)
+        data = text.encode("latin-1", "replace")
+        for name, binary, func in cases:
+            payload = data if binary else text
+            seconds = best_time(lambda: func(payload), repeat)
+            results[f"transform/{name}/{size}"] = {"seconds": seconds, "mb_per_s": size / seconds / 1e6}
+    return results
+
+
+def bench_attacks(caesar_lengths: List[int], mono_lengths: List[int], repeat: int,
+                  rng: random.Random) -> Dict[str, dict]:
+    """Latency of both attacks against ciphertext length"""
+    from app import caesar_attack
+    from substitution_solver import solve
+    from vigenere_attack import vigenere_attack
+
+    results = {}
+    for length in caesar_lengths:
+        ciphertext = caesar_ascii_encrypt(english_text(length), 3)
+        for include in ("none", "full"):
+            seconds = best_time(lambda: caesar_attack(ciphertext, 5, include=include), repeat)
+            results[f"attack/caesar_attack/include_{include}/{length}"] = {"seconds": seconds}
+        ciphertext = vigenere_encrypt(english_text(length), "CRYPTOGRAPHY")
+        seconds = best_time(lambda: vigenere_attack(ciphertext, include="none"), repeat)
+        results[f"attack/vigenere_attack/{length}"] = {"seconds": seconds}
+
+    key = random_key(string.printable, rng)
+    for length in mono_lengths:
+        ciphertext = substitute(english_text(length), key)
+        # The solver runs inline so the timing excludes process pool start-up
+        seconds = best_time(lambda: solve(ciphertext, string.printable, restarts=SOLVER_RESTARTS,
+                                          time_limit=3600, max_iterations=SOLVER_ITERATIONS,
+                                          inline=True, seed=0), repeat)
+        results[f"attack/monoalphabetic_attack/{length}"] = {"seconds": seconds}
+    return results
+
+
+def bench_endpoints(requests: int, rng: random.Random) -> Dict[str, dict]:
+    """
+    End-to-end request latency through the app with an in-process test client
+    Attack requests rotate their ciphertext every time, so they are timed on
+    result cache misses.
+    """
+    from fastapi.testclient import TestClient
+    from app import app, job_store
+
+    small = english_text(200)
+    medium = english_text(100_000)
+    key = random_key(string.printable, rng)
+    cases = [
+        ("caesar_encrypt/small", "/caesar/encrypt", {"json": {"text": small, "shift": 3}}),
+        ("caesar_encrypt/100k", "/caesar/encrypt", {"json": {"text": medium, "shift": 3}}),
+        ("caesar_attack/100k", "/caesar/attack",
+         lambda i: {"json": {"text": medium[i:] + medium[:i], "include": "none"}}),
+        ("caesar_encrypt_stream/100k", "/caesar/encrypt/stream?shift=3", {"content": medium.encode()}),
+        ("monoalphabetic_decrypt/small", "/monoalphabetic/decrypt", {"json": {"text": small, "key": key}}),
+        ("batch/100x200", "/batch", {"json": {"items": [{"op": "caesar_encrypt", "text": small, "shift": 3}] * 100}}),
+    ]
+
+    results = {}
+    # The job scheduler starts with the app; keep its store out of the shared state directory
+    with tempfile.TemporaryDirectory() as state_dir:
+        job_store.path = os.path.join(state_dir, "jobs.db")
+        with TestClient(app) as client:
+            for name, path, kwargs in cases:
+                request = kwargs if callable(kwargs) else lambda i, kwargs=kwargs: kwargs
+                client.post(path, **request(requests)).raise_for_status()
+                latencies = []
+                for i in range(requests):
+                    body = request(i)
+                    start = time.perf_counter()
+                    client.post(path, **body)
+                    latencies.append(time.perf_counter() - start)
+                latencies.sort()
+                results[f"endpoint/{name}"] = {
+                    "seconds": latencies[len(latencies) // 2],
+                    "p99_seconds": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)],
+                }
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """
+    Flag benchmarks that got slower than the baseline
+    Parameters:
+        results (Dict[str, dict]): Current results by benchmark name
+        baseline (Dict[str, dict]): Saved results by benchmark name
+        threshold (float): Relative slowdown tolerated, e.g. 0.25 for 25%
+    Returns:
+        List[str]: One line per regression
+    """
+    regressions = []
+    for name, result in results.items():
+        saved = baseline.get(name)
+        if saved is None:
+            continue
+        ratio = result["seconds"] / saved["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {saved['seconds'] * 1000:.3f} ms -> "
+                               f"{result['seconds'] * 1000:.3f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def run(groups: List[str], max_size: int, repeat: int, requests: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    results = {}
+    if "transform" in groups:
+        results.update(bench_transforms([size for size in TRANSFORM_SIZES if size <= max_size], repeat, rng))
+    if "attack" in groups:
+        results.update(bench_attacks([length for length in CAESAR_ATTACK_LENGTHS if length <= max_size],
+                                     [length for length in MONOALPHABETIC_ATTACK_LENGTHS if length <= max_size],
+                                     repeat, rng))
+    if "endpoint" in groups:
+        results.update(bench_endpoints(requests, rng))
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "groups": groups,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def print_results(results: Dict[str, dict]) -> None:
+    print(f"{'Benchmark':<54} {'ms':>12} {'MB/s':>10}")
+    print("-" * 78)
+    for name, result in results.items():
+        rate = f"{result['mb_per_s']:10.1f}" if "mb_per_s" in result else f"{'':>10}"
+        print(f"{name:<54} {result['seconds'] * 1000:12.3f} {rate}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transforms, attacks and endpoints")
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--max-size", type=int, default=TRANSFORM_SIZES[-1],
+                        help="Largest input size or ciphertext length")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    parser.add_argument("--requests", type=int, default=ENDPOINT_REQUESTS, help="Requests per endpoint benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    report = run(args.groups, args.max_size, args.repeat, args.requests, args.seed)
+    print_results(report["results"])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline: Optional[dict] = json.load(f)
+        regressions = compare(report["results"], baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
@@ -1,22 +1,37 @@
 from caesar_decryption import caesar_decrypt
-from typing import List, Dict
+from frequency_analysis import best_candidates, DEFAULT_SAMPLE_SIZE
+from word_scorer import get_word_scorer
+from typing import List, Dict, Optional
 
-def caesar_attack(ciphertext: str) -> List[Dict[str, any]]:
+def caesar_attack(ciphertext: str, top_k: Optional[int] = None,
+                  sample_size: int = DEFAULT_SAMPLE_SIZE) -> List[Dict[str, any]]:
     """
     Perform a brute force attack on Caesar cipher encrypted text
+    Every shift is scored with chi-squared against English letter frequencies
+    on the first `sample_size` characters; only the best `top_k` shifts are
+    fully decrypted, and they are ordered by the share of their plaintext
+    covered by dictionary words (`confidence`).
     Parameters:
         ciphertext (str): The encrypted text to attack
+        top_k (int): Number of candidates to return (all 26 when None)
+        sample_size (int): Number of ciphertext characters used for scoring
     Returns:
-        List[Dict]: List of dictionaries containing shift values and corresponding decrypted text
+        List[Dict]: List of dictionaries containing shift values, scores,
+                    confidence and corresponding decrypted text, most likely first
     """
-    results = []
     # Try all possible shifts (0-25)
-    for shift in range(26):
-        decrypted = caesar_decrypt(ciphertext, shift)
+    candidates = best_candidates(ciphertext[:sample_size], caesar_decrypt, range(26), top_k or 26)
+    scorer = get_word_scorer()
+    results = []
+    for score, shift in candidates:
+        plaintext = caesar_decrypt(ciphertext, shift)
         results.append({
             "shift": shift,
-            "plaintext": decrypted
+            "score": round(score, 3),
+            "confidence": round(scorer.coverage(plaintext[:sample_size]), 3),
+            "plaintext": plaintext
         })
+    results.sort(key=lambda result: -result["confidence"])
     return results
 
 def print_attack_results(results: List[Dict[str, any]]) -> None:
@@ -26,16 +41,17 @@ def print_attack_results(results: List[Dict[str, any]]) -> None:
     print("\nBrute Force Attack Results:")
     print("-" * 50)
     for result in results:
-        print(f"Shift {result['shift']:2d}: {result['plaintext']}")
+        print(f"Shift {result['shift']:2d} (score {result['score']:10.3f}, "
+              f"confidence {result['confidence']:.3f}): {result['plaintext']}")
     print("-" * 50)
 
 if __name__ == "__main__":
     # Test the attack function
     test_text = "KHOOR Zruog! 123"  # "HELLO World! 123" encrypted with shift=3
     print(f"Encrypted text: {test_text}")
-    
+
     # Perform the attack
-    results = caesar_attack(test_text)
-    
+    results = caesar_attack(test_text, top_k=5)
+
     # Print results
-    print_attack_results(results) 
\ No newline at end of file
+    print_attack_results(results)
@@ -1,16 +1,7 @@
+from cipher_core import caesar_alpha_decrypt
+
 def caesar_decrypt(ciphertext: str, shift: int) -> str:
-    decrypted_text = ""
-    for char in ciphertext:
-        if char.isalpha():
-            shift_amount = shift % 26
-            if char.isupper():
-                new_char = chr(((ord(char) - ord('A') - shift_amount) % 26) + ord('A'))
-            else:
-                new_char = chr(((ord(char) - ord('a') - shift_amount) % 26) + ord('a'))
-            decrypted_text += new_char
-        else:
-            decrypted_text += char
-    return decrypted_text
+    return caesar_alpha_decrypt(ciphertext, shift)
 
 if __name__ == "__main__":
     test_text = "KHOOR Zruog! 123"
@@ -1,3 +1,5 @@
+from cipher_core import caesar_alpha_encrypt
+
 def caesar_encrypt(plaintext: str, shift: int) -> str:
     """
     Encrypt text using Caesar cipher, only shifting alphabetic characters
@@ -7,24 +9,7 @@ def caesar_encrypt(plaintext: str, shift: int) -> str:
     Returns:
         str: The encrypted text
     """
-    encrypted_text = ""
-    for char in plaintext:
-        if char.isalpha():
-            # Calculate shift amount (ensure it's between 0-25)
-            shift_amount = shift % 26
-            
-            # Handle uppercase and lowercase separately
-            if char.isupper():
-                # Convert to 0-25 range, apply shift, and convert back to ASCII
-                new_char = chr(((ord(char) - ord('A') + shift_amount) % 26) + ord('A'))
-            else:
-                # Convert to 0-25 range, apply shift, and convert back to ASCII
-                new_char = chr(((ord(char) - ord('a') + shift_amount) % 26) + ord('a'))
-            encrypted_text += new_char
-        else:
-            # Keep non-alphabetic characters unchanged
-            encrypted_text += char
-    return encrypted_text
+    return caesar_alpha_encrypt(plaintext, shift)
 
 if __name__ == "__main__":
     # Test the encryption function
@@ -0,0 +1,272 @@
+from typing import Callable, Dict, Optional, Tuple, Union
+from functools import lru_cache
+
+# Number of compiled substitution tables kept around between calls
+SUBSTITUTION_CACHE_SIZE = 256
+
+# Bytes translated at a time by translate_into
+BYTE_CHUNK_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=256)
+def ascii_shift_table(shift: int) -> bytes:
+    """
+    Build the translation table for the mod-256 Caesar cipher used by the API
+    Parameters:
+        shift (int): The shift value (0-255)
+    Returns:
+        bytes: Latin-1 byte table shifting ASCII values (wrapping around 256)
+               and leaving bytes 128-255 unchanged
+    """
+    shift %= 256
+    return bytes([(i + shift) % 256 for i in range(128)] + list(range(128, 256)))
+
+
+@lru_cache(maxsize=26)
+def alpha_shift_table(shift: int) -> Dict[int, int]:
+    """
+    Build the translation table for the classic Caesar cipher
+    Parameters:
+        shift (int): The shift value, reduced to 0-25
+    Returns:
+        Dict[int, int]: str.translate table shifting A-Z and a-z, preserving case
+    """
+    shift %= 26
+    table = {}
+    for base in (ord('A'), ord('a')):
+        for i in range(26):
+            table[base + i] = base + (i + shift) % 26
+    return table
+
+
+@lru_cache(maxsize=26)
+def alpha_byte_table(shift: int) -> bytes:
+    """
+    Build the 256-entry byte table for a letter shift
+    Parameters:
+        shift (int): The shift value, reduced to 0-25
+    Returns:
+        bytes: Table shifting A-Z and a-z, preserving case, other bytes unchanged
+    """
+    table = bytearray(range(256))
+    for code, shifted in alpha_shift_table(shift).items():
+        table[code] = shifted
+    return bytes(table)
+
+
+@lru_cache(maxsize=26)
+def beaufort_byte_table(shift: int) -> bytes:
+    """
+    Build the 256-entry byte table for a Beaufort key letter
+    Each letter p maps to (shift - p) mod 26, preserving case; the table is its
+    own inverse, so it both encrypts and decrypts.
+    """
+    shift %= 26
+    table = bytearray(range(256))
+    for base in (ord('A'), ord('a')):
+        for i in range(26):
+            table[base + i] = base + (shift - i) % 26
+    return bytes(table)
+
+
+@lru_cache(maxsize=256)
+def byte_shift_table(shift: int) -> bytes:
+    """
+    Build the bytes.translate table for a mod-256 shift over every byte value
+    Parameters:
+        shift (int): The shift value (0-255)
+    Returns:
+        bytes: 256-byte translation table
+    """
+    shift %= 256
+    return bytes((i + shift) % 256 for i in range(256))
+
+
+def translate_latin1(text: str, byte_table: bytes, str_table: Optional[dict] = None) -> str:
+    """
+    Apply a 256-entry byte table to text
+    Text that fits in Latin-1 goes through bytes.translate, which is much faster
+    than str.translate once the output leaves ASCII. Anything else falls back to
+    str.translate with `str_table` (or the byte table as a code point mapping),
+    leaving characters above 255 unchanged.
+    """
+    try:
+        data = text.encode('latin-1')
+    except UnicodeEncodeError:
+        if str_table is None:
+            str_table = dict(enumerate(byte_table))
+        return text.translate(str_table)
+    return data.translate(byte_table).decode('latin-1')
+
+
+def substitution_table(key: Dict[str, str], inverse: bool = False) -> Tuple[Dict[int, str], Optional[bytes]]:
+    """
+    Compile a substitution key into translation tables, reusing cached tables
+    Parameters:
+        key (Dict[str, str]): Mapping of plaintext characters to ciphertext characters
+        inverse (bool): Build the decryption tables instead of the encryption ones
+    Returns:
+        Tuple[Dict[int, str], Optional[bytes]]: str.translate table, and a Latin-1
+            byte table when every mapped character fits in one byte
+    """
+    return _compile_substitution(tuple(key.items()), inverse)
+
+
+# lru_cache keeps the cache consistent when keys are compiled from several
+# threads at once
+@lru_cache(maxsize=SUBSTITUTION_CACHE_SIZE)
+def _compile_substitution(items: Tuple[Tuple[str, str], ...],
+                          inverse: bool) -> Tuple[Dict[int, str], Optional[bytes]]:
+    # Multi-character entries can never match a single character, so
+    # they are left out of the table
+    pairs = [(v, k) if inverse else (k, v) for k, v in items]
+    str_table = {ord(src): dst for src, dst in pairs if len(src) == 1}
+
+    byte_table = None
+    if all(c < 256 and len(dst) == 1 and ord(dst) < 256 for c, dst in str_table.items()):
+        table = bytearray(range(256))
+        for c, dst in str_table.items():
+            table[c] = ord(dst)
+        byte_table = bytes(table)
+    return str_table, byte_table
+
+
+def caesar_ascii_encrypt(text: str, shift: int) -> str:
+    """Shift ASCII characters by `shift` modulo 256, leaving others unchanged"""
+    return translate_latin1(text, ascii_shift_table(shift % 256))
+
+
+def caesar_ascii_decrypt(text: str, shift: int) -> str:
+    """Undo caesar_ascii_encrypt by applying the complementary shift"""
+    return translate_latin1(text, ascii_shift_table((256 - shift) % 256))
+
+
+def caesar_alpha_encrypt(text: str, shift: int) -> str:
+    """Shift letters by `shift` modulo 26, leaving other characters unchanged"""
+    return text.translate(alpha_shift_table(shift % 26))
+
+
+def caesar_alpha_decrypt(text: str, shift: int) -> str:
+    """Undo caesar_alpha_encrypt"""
+    return text.translate(alpha_shift_table(-shift % 26))
+
+
+def _apply_substitution(text: str, tables: Tuple[Dict[int, str], Optional[bytes]]) -> str:
+    str_table, byte_table = tables
+    if byte_table is None:
+        return text.translate(str_table)
+    return translate_latin1(text, byte_table, str_table)
+
+
+def substitute(text: str, key: Dict[str, str]) -> str:
+    """Encrypt text with a substitution key; unmapped characters are kept"""
+    return _apply_substitution(text, substitution_table(key))
+
+
+def unsubstitute(text: str, key: Dict[str, str]) -> str:
+    """Decrypt text with the substitution key that was used to encrypt it"""
+    return _apply_substitution(text, substitution_table(key, inverse=True))
+
+
+def substitution_transform(key: Dict[str, str], inverse: bool = False) -> Callable[[str], str]:
+    """
+    Compile a substitution key once and return the function applying it
+    Useful when many texts share a key: the cache lookup, which hashes the
+    whole key, happens only here instead of once per text.
+    """
+    tables = substitution_table(key, inverse)
+    return lambda text: _apply_substitution(text, tables)
+
+
+# Bytes mode: the same ciphers applied to raw bytes with byte tables, without
+# decoding to str. Caesar shifts every byte value modulo 256.
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def byte_substitution_table(key: Dict[str, str], inverse: bool = False) -> bytes:
+    """
+    Compile a substitution key into a bytes.translate table
+    Raises:
+        ValueError: If the key maps characters outside Latin-1
+    """
+    byte_table = substitution_table(key, inverse)[1]
+    if byte_table is None:
+        raise ValueError("Key maps characters outside Latin-1 and cannot be applied to bytes")
+    return byte_table
+
+
+def translate_bytes(data: BytesLike, table: bytes) -> bytes:
+    """Apply a byte table to bytes, bytearray, memoryview or mmap data"""
+    if isinstance(data, bytes):
+        return data.translate(table)
+    return bytes(data).translate(table)
+
+
+def translate_into(source: BytesLike, table: bytes, target: Optional[BytesLike] = None,
+                   chunk_size: int = BYTE_CHUNK_SIZE) -> None:
+    """
+    Apply a byte table chunk by chunk, so at most `chunk_size` bytes are copied at once
+    Parameters:
+        source (BytesLike): Input buffer (bytes, bytearray, memoryview or mmap)
+        table (bytes): 256-byte translation table
+        target (BytesLike): Writable buffer of the same length receiving the
+                            result; `source` itself is overwritten when omitted
+        chunk_size (int): Number of bytes translated at a time
+    """
+    with memoryview(source) as src, memoryview(source if target is None else target) as dst:
+        if len(dst) != len(src):
+            raise ValueError("Target must have the same length as the source")
+        for start in range(0, len(src), chunk_size):
+            end = start + chunk_size
+            dst[start:end] = src[start:end].tobytes().translate(table)
+
+
+def caesar_bytes_encrypt(data: BytesLike, shift: int) -> bytes:
+    """Shift every byte by `shift` modulo 256"""
+    return translate_bytes(data, byte_shift_table(shift % 256))
+
+
+def caesar_bytes_decrypt(data: BytesLike, shift: int) -> bytes:
+    """Undo caesar_bytes_encrypt"""
+    return translate_bytes(data, byte_shift_table(-shift % 256))
+
+
+def substitute_bytes(data: BytesLike, key: Dict[str, str]) -> bytes:
+    """Encrypt bytes with a substitution key over Latin-1 characters"""
+    return translate_bytes(data, byte_substitution_table(key))
+
+
+def unsubstitute_bytes(data: BytesLike, key: Dict[str, str]) -> bytes:
+    """Decrypt bytes encrypted with substitute_bytes"""
+    return translate_bytes(data, byte_substitution_table(key, inverse=True))
+
+
+class CompiledKey:
+    """
+    A substitution key compiled into forward and inverse translation tables
+    Attributes:
+        key (Dict[str, str]): Mapping of plaintext characters to ciphertext characters
+    """
+
+    def __init__(self, key: Dict[str, str]):
+        self.key = dict(key)
+        self._forward = substitution_table(self.key)
+        self._inverse = substitution_table(self.key, inverse=True)
+
+    def encrypt(self, text: str) -> str:
+        return _apply_substitution(text, self._forward)
+
+    def decrypt(self, text: str) -> str:
+        return _apply_substitution(text, self._inverse)
+
+    def encrypt_bytes(self, data: BytesLike) -> bytes:
+        return translate_bytes(data, self._byte_table(self._forward))
+
+    def decrypt_bytes(self, data: BytesLike) -> bytes:
+        return translate_bytes(data, self._byte_table(self._inverse))
+
+    @staticmethod
+    def _byte_table(tables: Tuple[Dict[int, str], Optional[bytes]]) -> bytes:
+        if tables[1] is None:
+            raise ValueError("Key maps characters outside Latin-1 and cannot be applied to bytes")
+        return tables[1]
@@ -0,0 +1,166 @@
+from typing import Any, Callable, List, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+import asyncio
+import os
+import threading
+import time
+
+from metrics import timed, profiling
+
+# Inputs up to INLINE_MAX_CHARS run directly on the event loop, inputs from
+# PROCESS_MIN_CHARS on go to the process pool, everything in between to the
+# thread pool. All values can be overridden through environment variables.
+INLINE_MAX_CHARS = int(os.environ.get("CIPHER_INLINE_MAX_CHARS", 16 * 1024))
+PROCESS_MIN_CHARS = int(os.environ.get("CIPHER_PROCESS_MIN_CHARS", 4 * 1024 * 1024))
+THREAD_WORKERS = int(os.environ.get("CIPHER_THREAD_WORKERS", 4))
+PROCESS_WORKERS = int(os.environ.get("CIPHER_PROCESS_WORKERS", os.cpu_count() or 1))
+
+# Tasks allowed to be queued or running per pool before requests are refused
+MAX_QUEUE_DEPTH = int(os.environ.get("CIPHER_MAX_QUEUE_DEPTH", 64))
+
+# Seconds a request may wait for its result
+DEFAULT_TIMEOUT = float(os.environ.get("CIPHER_TIMEOUT", 30.0))
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+
+
+class ExecutorBusy(Exception):
+    """Raised when a pool already holds MAX_QUEUE_DEPTH tasks"""
+
+    def __init__(self, lane: str):
+        super().__init__(f"The {lane} pool is busy, try again later")
+        self.lane = lane
+
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_in_flight = {THREAD: 0, PROCESS: 0}
+_in_flight_lock = threading.Lock()
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=THREAD_WORKERS, thread_name_prefix="cipher")
+    return _thread_pool
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process pool shared by cipher work, batch slices and solver restarts"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS)
+    return _process_pool
+
+
+def choose_lane(size: int, attack: bool = False) -> str:
+    """Pick where work on `size` characters should run; attacks skip the thread pool"""
+    if size <= INLINE_MAX_CHARS:
+        return INLINE
+    if size < PROCESS_MIN_CHARS and not attack:
+        return THREAD
+    return PROCESS
+
+
+async def run(func: Callable[..., Any], *args, size: int = 0, lane: Optional[str] = None,
+              timeout: Optional[float] = DEFAULT_TIMEOUT, **kwargs) -> Any:
+    """
+    Run CPU-bound work without blocking the event loop
+    Parameters:
+        func (Callable): Function to call; it must be picklable for the process pool
+        size (int): Input size in characters, used to pick the lane
+        lane (str): Force INLINE, THREAD or PROCESS instead of choosing by size
+        timeout (float): Seconds to wait for the result (None waits forever)
+    Returns:
+        Any: The function's return value
+    Raises:
+        ExecutorBusy: When the chosen pool already holds MAX_QUEUE_DEPTH tasks
+        asyncio.TimeoutError: When the result is not ready within `timeout`
+    """
+    # Profiled requests run inline so the profiler sees the work
+    lane = INLINE if profiling() else lane or choose_lane(size)
+    with timed("core"):
+        if lane == INLINE:
+            return func(*args, **kwargs)
+
+        pool: Executor = get_thread_pool() if lane == THREAD else get_process_pool()
+        _acquire(lane)
+        try:
+            future = pool.submit(partial(func, *args, **kwargs))
+        except BaseException:
+            _release(lane)
+            raise
+        # The slot is released once the task has actually stopped running, so
+        # a timed-out task keeps counting towards the queue depth
+        future.add_done_callback(lambda _: _release(lane))
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+
+def map_process(func: Callable[..., Any], *iterables, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                window: Optional[int] = None) -> List[Any]:
+    """
+    Call `func` on the process pool for each set of arguments, from synchronous
+    code such as a thread pool task; the calls count towards the process pool's
+    queue depth like run() does
+    Parameters:
+        func (Callable): Picklable function to call
+        iterables: Argument lists, as for map()
+        timeout (float): Seconds to wait for all results (None waits forever)
+        window (int): Most calls submitted at once (None submits all of them);
+                      never more than MAX_QUEUE_DEPTH
+    Returns:
+        List: The return values in argument order
+    Raises:
+        ExecutorBusy: When the process pool cannot take `window` more tasks
+        TimeoutError: When the results are not ready within `timeout`; calls
+                      not yet started are cancelled
+    """
+    calls = list(zip(*iterables))
+    # The window never asks for more slots than the queue can ever hold
+    window = min(window or len(calls), len(calls), MAX_QUEUE_DEPTH)
+    if not window:
+        return []
+    # The window's slots are taken up front and handed from call to call
+    _acquire(PROCESS, window)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pool = get_process_pool()
+    results: List[Any] = [None] * len(calls)
+    pending = {}
+    submitted = 0
+    try:
+        while submitted < len(calls) or pending:
+            while submitted < len(calls) and len(pending) < window:
+                pending[pool.submit(func, *calls[submitted])] = submitted
+                submitted += 1
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f"{func.__name__} did not finish within {timeout} seconds")
+            for future in done:
+                results[pending.pop(future)] = future.result()
+    finally:
+        running = [future for future in pending if not future.cancel()]
+        _release(PROCESS, window - len(running))
+        for future in running:
+            future.add_done_callback(lambda _: _release(PROCESS))
+    return results
+
+
+def _acquire(lane: str, count: int = 1) -> None:
+    with _in_flight_lock:
+        if _in_flight[lane] + count > MAX_QUEUE_DEPTH:
+            raise ExecutorBusy(lane)
+        _in_flight[lane] += count
+
+
+def _release(lane: str, count: int = 1) -> None:
+    with _in_flight_lock:
+        _in_flight[lane] -= count
+
+
+def queue_depth() -> dict:
+    """Number of tasks queued or running per pool"""
+    return dict(_in_flight)
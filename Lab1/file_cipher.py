@@ -0,0 +1,95 @@
+import argparse
+import json
+import mmap
+import os
+from typing import Dict, Optional
+
+from cipher_core import byte_shift_table, byte_substitution_table, translate_into, BYTE_CHUNK_SIZE
+
+# Operations accepted by the command line, named like the batch operations
+FILE_OPS = ("caesar_encrypt", "caesar_decrypt", "monoalphabetic_encrypt", "monoalphabetic_decrypt")
+
+
+def file_table(op: str, shift: Optional[int] = None, key: Optional[Dict[str, str]] = None) -> bytes:
+    """
+    Return the byte table for an operation
+    Caesar shifts every byte modulo 256; substitution keys must map Latin-1
+    characters, which stand for the byte values 0-255.
+    """
+    if op == "caesar_encrypt":
+        return byte_shift_table(shift % 256)
+    if op == "caesar_decrypt":
+        return byte_shift_table(-shift % 256)
+    if op == "monoalphabetic_encrypt":
+        return byte_substitution_table(key)
+    if op == "monoalphabetic_decrypt":
+        return byte_substitution_table(key, inverse=True)
+    raise ValueError(f"Unknown file operation: {op}")
+
+
+def transform_file(path: str, table: bytes, output: Optional[str] = None,
+                   chunk_size: int = BYTE_CHUNK_SIZE) -> int:
+    """
+    Apply a byte table to a file through memory-mapped I/O
+    The file is never decoded or read into memory as a whole; pages are mapped
+    and translated `chunk_size` bytes at a time.
+    Parameters:
+        path (str): File to transform
+        table (bytes): 256-byte translation table
+        output (str): Path to write the result to; the file is transformed in
+                      place when omitted
+        chunk_size (int): Number of bytes translated at a time
+    Returns:
+        int: Number of bytes transformed
+    """
+    size = os.path.getsize(path)
+    if output is not None and os.path.exists(output) and os.path.samefile(path, output):
+        output = None
+
+    if output is None:
+        if size:
+            with open(path, "r+b") as f, mmap.mmap(f.fileno(), 0) as mapped:
+                translate_into(mapped, table, chunk_size=chunk_size)
+                mapped.flush()
+        return size
+
+    with open(path, "rb") as src, open(output, "w+b") as dst:
+        if size:
+            dst.truncate(size)
+            with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as source, \
+                    mmap.mmap(dst.fileno(), 0) as target:
+                translate_into(source, table, target, chunk_size)
+                target.flush()
+    return size
+
+
+def load_key(path: str) -> Dict[str, str]:
+    """Read a substitution key saved as a JSON object, as returned by the API"""
+    with open(path, encoding="utf-8") as f:
+        key = json.load(f)
+    if not isinstance(key, dict) or not all(isinstance(v, str) for v in key.values()):
+        raise ValueError("Key file must hold a JSON object mapping characters to characters")
+    return key
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encrypt or decrypt files as bytes through memory-mapped I/O")
+    parser.add_argument("op", choices=FILE_OPS)
+    parser.add_argument("path", help="File to transform")
+    parser.add_argument("-o", "--output", help="Write the result here instead of transforming in place")
+    parser.add_argument("--shift", type=int, help="Shift value for Caesar operations")
+    parser.add_argument("--key", help="JSON file holding the substitution key for monoalphabetic operations")
+    parser.add_argument("--chunk-size", type=int, default=BYTE_CHUNK_SIZE, help="Bytes translated at a time")
+    args = parser.parse_args()
+
+    if args.op.startswith("caesar") and args.shift is None:
+        parser.error("--shift is required for Caesar operations")
+    if args.op.startswith("monoalphabetic") and args.key is None:
+        parser.error("--key is required for monoalphabetic operations")
+
+    try:
+        table = file_table(args.op, args.shift, load_key(args.key) if args.key else None)
+    except ValueError as e:
+        parser.error(str(e))
+    size = transform_file(args.path, table, args.output, args.chunk_size)
+    print(f"Transformed {size} bytes")
@@ -0,0 +1,113 @@
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+import heapq
+import numpy as np
+
+from text_stats import TextStats, to_codes, category_of, CATEGORIES, CATEGORY_COUNT, \
+    LETTER_CATEGORIES, UNPRINTABLE_CATEGORY
+
+# Relative frequencies of letters in English text
+ENGLISH_LETTER_FREQUENCIES = {
+    'a': 0.08167, 'b': 0.01492, 'c': 0.02782, 'd': 0.04253, 'e': 0.12702,
+    'f': 0.02228, 'g': 0.02015, 'h': 0.06094, 'i': 0.06966, 'j': 0.00153,
+    'k': 0.00772, 'l': 0.04025, 'm': 0.02406, 'n': 0.06749, 'o': 0.07507,
+    'p': 0.01929, 'q': 0.00095, 'r': 0.05987, 's': 0.06327, 't': 0.09056,
+    'u': 0.02758, 'v': 0.00978, 'w': 0.02360, 'x': 0.00150, 'y': 0.01974,
+    'z': 0.00074,
+}
+
+# The same frequencies as an array indexed by letter (a = 0)
+ENGLISH_LETTER_VECTOR = np.array(list(ENGLISH_LETTER_FREQUENCIES.values()))
+
+# Share of letters among all characters of typical English prose
+ENGLISH_LETTER_SHARE = 0.8
+
+# Share of unprintable characters tolerated in a plaintext
+ENGLISH_UNPRINTABLE_SHARE = 0.0001
+
+# Default number of ciphertext characters used to score a candidate key
+DEFAULT_SAMPLE_SIZE = 4096
+
+
+def chi_squared_scores(category_counts: np.ndarray, total: Optional[int] = None,
+                       letter_frequencies: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Compare per-category character counts against English, for many candidates at once
+    Parameters:
+        category_counts (np.ndarray): One row of CATEGORY_COUNT counts per candidate
+        total (int): Total number of characters counted. When given, printable
+                     non-letters and unprintable characters are scored as two
+                     extra categories, so candidates that turn the text into
+                     symbols or control characters lose.
+        letter_frequencies (np.ndarray): Expected frequencies of a-z, such as a
+                                         language model's (English by default)
+    Returns:
+        np.ndarray: Chi-squared statistic per candidate (lower means more
+                    English-like), infinity for candidates without letters
+    """
+    counts = np.atleast_2d(np.asarray(category_counts, dtype=np.float64))
+    letter_counts = counts[:, :LETTER_CATEGORIES]
+    letters = letter_counts.sum(axis=1)
+    if letters.max(initial=0) == 0:
+        return np.full(len(counts), np.inf)
+    if total is None:
+        expected_letters = letters
+        scores = np.zeros(len(counts))
+    else:
+        unprintable = counts[:, UNPRINTABLE_CATEGORY]
+        expected_letters = np.full(len(counts), total * ENGLISH_LETTER_SHARE)
+        expected_unprintable = total * ENGLISH_UNPRINTABLE_SHARE
+        expected_other = total - expected_letters - expected_unprintable
+        scores = ((total - letters - unprintable) - expected_other) ** 2 / expected_other
+        scores += (unprintable - expected_unprintable) ** 2 / expected_unprintable
+    if letter_frequencies is None:
+        letter_frequencies = ENGLISH_LETTER_VECTOR
+    expected = expected_letters[:, None] * letter_frequencies
+    # Rows without letters divide by zero here; they are set to infinity below
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = scores + ((letter_counts - expected) ** 2 / expected).sum(axis=1)
+    scores[letters == 0] = np.inf
+    return scores
+
+
+def score_candidates(sample: Union[str, TextStats], decrypt: Callable[[str, int], str],
+                     keys: Iterable[int], letter_frequencies: Optional[np.ndarray] = None) -> List[Tuple[float, int]]:
+    """
+    Score candidate keys for a character-wise cipher on a ciphertext sample
+    The sample is reduced to a histogram once; each key only has to decrypt the
+    distinct characters, so the cost per key does not depend on the sample length.
+    Parameters:
+        sample (Union[str, TextStats]): Ciphertext sample, or statistics already
+                                        gathered from the ciphertext
+        decrypt (Callable[[str, int], str]): Function decrypting text with a key
+        keys (Iterable[int]): Candidate keys to try
+        letter_frequencies (np.ndarray): Expected letter frequencies (English by default)
+    Returns:
+        List[Tuple[float, int]]: (chi-squared score, key) pairs in key order
+    """
+    stats = sample if isinstance(sample, TextStats) else TextStats(sample, order=1)
+    used = np.flatnonzero(stats.unigrams)
+    distinct = used.astype(np.uint8).tobytes().decode('latin-1')
+    weights = stats.unigrams[used]
+
+    keys = list(keys)
+    category_counts = np.zeros((len(keys), CATEGORY_COUNT))
+    for row, key in enumerate(keys):
+        decrypted = decrypt(distinct, key)
+        codes, skipped = to_codes(decrypted)
+        if not skipped and len(codes) == len(used):
+            category_counts[row] = np.bincount(CATEGORIES[codes], weights=weights, minlength=CATEGORY_COUNT)
+        else:
+            # The key maps some characters outside Latin-1
+            for char, count in zip(decrypted, weights):
+                category_counts[row, category_of(char)] += count
+    # Characters outside Latin-1 are not decrypted by the histogram; they count
+    # as printable non-letters through `total`
+    scores = chi_squared_scores(category_counts, stats.total, letter_frequencies)
+    return [(float(score), key) for score, key in zip(scores, keys)]
+
+
+def best_candidates(sample: Union[str, TextStats], decrypt: Callable[[str, int], str],
+                    keys: Iterable[int], top_k: int,
+                    letter_frequencies: Optional[np.ndarray] = None) -> List[Tuple[float, int]]:
+    """Return the `top_k` lowest-scoring (score, key) pairs, best first"""
+    return heapq.nsmallest(top_k, score_candidates(sample, decrypt, keys, letter_frequencies))
@@ -0,0 +1,358 @@
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+import asyncio
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+
+from executor import run, ExecutorBusy, THREAD
+from sqlite_store import connect_shared
+
+# SQLite file holding every job with its latest checkpoint; worker processes
+# and restarted servers pick up the same jobs from it
+JOB_STORE_PATH = os.environ.get("CIPHER_JOB_STORE_PATH") or os.path.join(tempfile.gettempdir(), "cipher-api", "jobs.db")
+
+# Jobs run at once per server process, jobs one client may have queued or
+# running, jobs of one client running at once, and jobs queued in total
+MAX_RUNNING_JOBS = int(os.environ.get("CIPHER_MAX_RUNNING_JOBS", 2))
+MAX_JOBS_PER_CLIENT = int(os.environ.get("CIPHER_MAX_JOBS_PER_CLIENT", 4))
+MAX_RUNNING_PER_CLIENT = int(os.environ.get("CIPHER_MAX_RUNNING_PER_CLIENT", 1))
+MAX_QUEUED_JOBS = int(os.environ.get("CIPHER_MAX_QUEUED_JOBS", 1000))
+
+# Seconds of work between checkpoints
+STEP_SECONDS = float(os.environ.get("CIPHER_JOB_STEP_SECONDS", 1.0))
+
+# Seconds finished jobs are kept; seconds without a checkpoint after which a
+# running job counts as abandoned by a crashed process; seconds between
+# polls of the store for new jobs and for progress
+JOB_TTL = float(os.environ.get("CIPHER_JOB_TTL", 86400.0))
+STALE_AFTER = 30.0
+POLL_INTERVAL = 0.5
+
+# Times a job's step is retried, POLL_INTERVAL apart, while the pools are busy
+# before the job fails
+BUSY_RETRIES = int(os.environ.get("CIPHER_JOB_BUSY_RETRIES", 120))
+PURGE_INTERVAL = 300.0
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobLimitExceeded(Exception):
+    """Raised when a client already has MAX_JOBS_PER_CLIENT unfinished jobs"""
+
+
+class JobQueueFull(Exception):
+    """Raised when MAX_QUEUED_JOBS jobs are waiting"""
+
+
+class JobKind(Protocol):
+    """
+    An attack split into resumable steps
+    The state is a JSON-serializable dict; every step continues from the state
+    the previous one returned, so a job resumes from its last checkpoint.
+    """
+
+    def start(self, text: str, params: dict) -> dict: ...
+
+    def step(self, text: str, params: dict, state: dict, deadline: float) -> dict: ...
+
+    def done(self, params: dict, state: dict) -> bool: ...
+
+    def report(self, text: str, params: dict, state: dict) -> Tuple[float, Optional[dict]]: ...
+
+    def finish(self, text: str, params: dict, state: dict) -> List[dict]: ...
+
+
+COLUMNS = ("id", "kind", "client", "status", "progress", "best", "result", "error", "created", "updated")
+
+
+class JobStore:
+    """
+    Attack jobs and their checkpoints in a shared SQLite table
+    A running job belongs to the process that claimed it (`owner`) and is
+    refreshed at every checkpoint; jobs whose owner stopped checkpointing are
+    claimed again by any process. The database is opened on first use.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH, max_per_client: int = MAX_JOBS_PER_CLIENT,
+                 max_running_per_client: int = MAX_RUNNING_PER_CLIENT, max_queued: int = MAX_QUEUED_JOBS,
+                 ttl: float = JOB_TTL):
+        self.path = path
+        self.max_per_client = max_per_client
+        self.max_running_per_client = max_running_per_client
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = connect_shared(self.path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, "
+                             "client TEXT NOT NULL, params TEXT NOT NULL, text TEXT NOT NULL, "
+                             "status TEXT NOT NULL, state TEXT, progress REAL NOT NULL DEFAULT 0, best TEXT, "
+                             "result TEXT, error TEXT, owner TEXT, heartbeat REAL, "
+                             "created REAL NOT NULL, updated REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+            self._db.commit()
+        return self._db
+
+    def create(self, kind: str, client: str, text: str, params: dict) -> str:
+        """
+        Queue a job, returning its ID
+        Raises:
+            JobLimitExceeded: When the client already has too many unfinished jobs
+            JobQueueFull: When too many jobs are waiting
+        """
+        job_id = secrets.token_urlsafe(12)
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                active = db.execute("SELECT COUNT(*) FROM jobs WHERE client = ? AND status IN (?, ?)",
+                                    (client, QUEUED, RUNNING)).fetchone()[0]
+                if active >= self.max_per_client:
+                    raise JobLimitExceeded(f"At most {self.max_per_client} unfinished jobs per client")
+                queued = db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+                if queued >= self.max_queued:
+                    raise JobQueueFull("The job queue is full, try again later")
+                db.execute("INSERT INTO jobs (id, kind, client, params, text, status, created, updated) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                           (job_id, kind, client, json.dumps(params), text, QUEUED, now, now))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status, progress, best candidate so far and result of a job, or None if unknown"""
+        with self._lock:
+            row = self._connect().execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?",
+                                          (job_id,)).fetchone()
+        return _job_info(row) if row else None
+
+    def list(self, client: str) -> List[Dict[str, Any]]:
+        """A client's jobs, newest first, without their results"""
+        with self._lock:
+            rows = self._connect().execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE client = ? "
+                                           "ORDER BY created DESC", (client,)).fetchall()
+        return [_job_info(row, result=False) for row in rows]
+
+    def claim(self, owner: str, kinds: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest runnable job: a queued job, or a running job whose
+        owner stopped checkpointing. Clients already running
+        `max_running_per_client` jobs are skipped so one client cannot take
+        every runner.
+        Returns:
+            Dict: id, kind, text, params and the last checkpointed state (None
+                  for a job that has not started), or None when nothing is runnable
+        """
+        now = time.time()
+        stale = now - STALE_AFTER
+        runnable = (f"FROM jobs AS job WHERE kind IN ({', '.join('?' * len(kinds))}) "
+                    "AND (status = ? OR (status = ? AND heartbeat < ?)) "
+                    "AND (SELECT COUNT(*) FROM jobs WHERE client = job.client AND status = ? "
+                    "AND heartbeat >= ?) < ? ORDER BY created LIMIT 1")
+        args = (*kinds, QUEUED, RUNNING, stale, RUNNING, stale, self.max_running_per_client)
+        with self._lock:
+            db = self._connect()
+            # Look without the write lock first; idle polls never take it
+            if db.execute(f"SELECT id {runnable}", args).fetchone() is None:
+                return None
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(f"SELECT id, kind, text, params, state {runnable}", args).fetchone()
+                if row is not None:
+                    db.execute("UPDATE jobs SET status = ?, owner = ?, heartbeat = ?, updated = ? WHERE id = ?",
+                               (RUNNING, owner, now, now, row[0]))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        if row is None:
+            return None
+        return {"id": row[0], "kind": row[1], "text": row[2], "params": json.loads(row[3]),
+                "state": json.loads(row[4]) if row[4] else None}
+
+    def checkpoint(self, job_id: str, owner: str, state: dict, progress: float, best: Optional[dict]) -> bool:
+        """
+        Save a running job's state
+        Returns:
+            bool: False when the job was cancelled or taken over by another
+                  process, so its runner should stop
+        """
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            updated = db.execute("UPDATE jobs SET state = ?, progress = ?, best = ?, heartbeat = ?, updated = ? "
+                                 "WHERE id = ? AND owner = ? AND status = ?",
+                                 (json.dumps(state), progress, json.dumps(best), now, now,
+                                  job_id, owner, RUNNING)).rowcount
+            db.commit()
+        return updated > 0
+
+    def finish(self, job_id: str, owner: str, status: str, result: Optional[List[dict]] = None,
+               error: Optional[str] = None) -> None:
+        """Record a job's outcome; the ciphertext and state are dropped"""
+        with self._lock:
+            db = self._connect()
+            db.execute("UPDATE jobs SET status = ?, progress = CASE WHEN ? = ? THEN 1 ELSE progress END, "
+                       "result = ?, error = ?, text = '', state = NULL, owner = NULL, updated = ? "
+                       "WHERE id = ? AND owner = ? AND status = ?",
+                       (status, status, COMPLETED, json.dumps(result) if result is not None else None, error,
+                        time.time(), job_id, owner, RUNNING))
+            db.commit()
+
+    def release(self, owner: str) -> int:
+        """Put an owner's running jobs back in the queue, keeping their checkpoints"""
+        with self._lock:
+            db = self._connect()
+            released = db.execute("UPDATE jobs SET status = ?, owner = NULL, updated = ? "
+                                  "WHERE owner = ? AND status = ?",
+                                  (QUEUED, time.time(), owner, RUNNING)).rowcount
+            db.commit()
+        return released
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job; a running job stops at its next
+        checkpoint and keeps the best candidate found so far
+        Returns:
+            bool: False when the job had already finished
+        """
+        with self._lock:
+            db = self._connect()
+            cancelled = db.execute("UPDATE jobs SET status = ?, text = '', state = NULL, owner = NULL, "
+                                   "updated = ? WHERE id = ? AND status IN (?, ?)",
+                                   (CANCELLED, time.time(), job_id, QUEUED, RUNNING)).rowcount
+            db.commit()
+        return cancelled > 0
+
+    def purge(self) -> int:
+        """Delete jobs that finished more than `ttl` seconds ago"""
+        with self._lock:
+            db = self._connect()
+            purged = db.execute(f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED))}) "
+                                "AND updated < ?", (*FINISHED, time.time() - self.ttl)).rowcount
+            db.commit()
+        return purged
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        with self._lock:
+            rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+def _job_info(row: tuple, result: bool = True) -> Dict[str, Any]:
+    job = dict(zip(COLUMNS, row))
+    info = {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": round(job["progress"], 3),
+        "best": json.loads(job["best"]) if job["best"] else None,
+        "created": job["created"],
+        "updated": job["updated"],
+    }
+    if job["error"]:
+        info["error"] = job["error"]
+    if result and job["result"]:
+        info["results"] = json.loads(job["result"])
+    return info
+
+
+class JobScheduler:
+    """
+    Runs queued jobs in the background of a server process
+    `workers` runner tasks claim jobs from the store and run them in steps of
+    about `step_seconds` on the executor's thread pool, checkpointing after
+    every step. Store calls block on SQLite, so they run on the thread pool
+    too. Stopping the scheduler lets the runners checkpoint their
+    current step and puts unfinished jobs back in the queue, so the next
+    process to start resumes them from their last checkpoint. A job whose
+    work still finds the pools busy after `busy_retries` attempts fails.
+    """
+
+    def __init__(self, store: JobStore, kinds: Dict[str, JobKind], workers: int = MAX_RUNNING_JOBS,
+                 step_seconds: float = STEP_SECONDS, busy_retries: int = BUSY_RETRIES):
+        self.store = store
+        self.kinds = kinds
+        self.workers = workers
+        self.step_seconds = step_seconds
+        self.busy_retries = busy_retries
+        self.owner = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self._purged = 0.0
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._stopping = False
+            self._tasks = [asyncio.create_task(self._runner()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = STALE_AFTER) -> None:
+        """Stop after the current steps, cancelling runners still busy after `timeout` seconds"""
+        self._stopping = True
+        _, busy = await asyncio.wait(self._tasks, timeout=timeout) if self._tasks else (None, [])
+        for task in busy:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._call(self.store.release, self.owner)
+
+    async def _runner(self) -> None:
+        while not self._stopping:
+            job = await self._call(self.store.claim, self.owner, list(self.kinds))
+            if job is None:
+                if time.time() - self._purged > PURGE_INTERVAL:
+                    self._purged = time.time()
+                    await self._call(self.store.purge)
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+            try:
+                await self._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                await self._call(self.store.finish, job["id"], self.owner, FAILED,
+                                 None, f"{type(exc).__name__}: {exc}")
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        kind = self.kinds[job["kind"]]
+        text, params, state = job["text"], job["params"], job["state"]
+        if state is None:
+            state = await self._call(kind.start, text, params, retries=self.busy_retries)
+        while not kind.done(params, state):
+            state = await self._call(kind.step, text, params, state, time.time() + self.step_seconds,
+                                    retries=self.busy_retries)
+            progress, best = await self._call(kind.report, text, params, state, retries=self.busy_retries)
+            if not await self._call(self.store.checkpoint, job["id"], self.owner, state, progress, best) \
+                    or self._stopping:
+                return
+        results = await self._call(kind.finish, text, params, state, retries=self.busy_retries)
+        await self._call(self.store.finish, job["id"], self.owner, COMPLETED, results)
+
+    async def _call(self, func, *args, retries: Optional[int] = None):
+        # Store calls wait for room in the thread pool; job work (with
+        # `retries`) gives up after that many busy attempts
+        attempt = 0
+        while True:
+            try:
+                return await run(func, *args, lane=THREAD, timeout=None)
+            except ExecutorBusy:
+                if retries is not None and attempt >= retries:
+                    raise
+                attempt += 1
+                await asyncio.sleep(POLL_INTERVAL)
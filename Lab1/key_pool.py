@@ -0,0 +1,83 @@
+from typing import Dict, List, Optional
+from collections import deque
+import os
+import string
+import threading
+import numpy as np
+
+# Keys kept ready per alphabet, and keys generated per batch; the pool is
+# refilled in the background once it drops below half its size
+POOL_SIZE = int(os.environ.get("CIPHER_KEY_POOL_SIZE", 1024))
+BATCH_SIZE = int(os.environ.get("CIPHER_KEY_POOL_BATCH", 256))
+
+
+def generate_keys(alphabet: str, count: int) -> List[Dict[str, str]]:
+    """
+    Generate random substitution keys in one batch from the OS CSPRNG
+    Every key position gets a 64-bit sort key from os.urandom(); sorting them
+    yields uniformly random permutations (ties have probability about 2**-64).
+    Parameters:
+        alphabet (str): Characters the keys permute
+        count (int): Number of keys to generate
+    Returns:
+        List[Dict[str, str]]: Keys mapping each character to its substitute
+    """
+    if count <= 0:
+        return []
+    size = len(alphabet)
+    sort_keys = np.frombuffer(os.urandom(8 * size * count), dtype=np.uint64).reshape(count, size)
+    permutations = np.argsort(sort_keys, axis=1).astype(np.uint32)
+    codes = np.frombuffer(alphabet.encode("utf-32-le"), dtype=np.uint32)
+    shuffled = codes[permutations].tobytes().decode("utf-32-le")
+    return [dict(zip(alphabet, shuffled[i * size:(i + 1) * size])) for i in range(count)]
+
+
+class KeyPool:
+    """
+    Pre-generated random keys for one alphabet
+    take() pops a ready key; a daemon thread tops the pool up in batches so
+    requests rarely pay for generation. The thread starts on first use, not
+    at import.
+    """
+
+    def __init__(self, alphabet: str, size: int = POOL_SIZE, batch_size: int = BATCH_SIZE):
+        self.alphabet = alphabet
+        self.size = size
+        self.batch_size = batch_size
+        self._keys: deque = deque()
+        self._lock = threading.Lock()
+        self._refill_thread: Optional[threading.Thread] = None
+
+    def take(self) -> Dict[str, str]:
+        """Return a fresh random key"""
+        return self.take_many(1)[0]
+
+    def take_many(self, count: int) -> List[Dict[str, str]]:
+        """Return `count` fresh random keys, generating any the pool is short of"""
+        keys = []
+        while len(keys) < count:
+            try:
+                keys.append(self._keys.popleft())
+            except IndexError:
+                keys.extend(generate_keys(self.alphabet, count - len(keys)))
+        if len(self._keys) < self.size // 2:
+            self._start_refill()
+        return keys
+
+    def _start_refill(self) -> None:
+        with self._lock:
+            if self._refill_thread is not None and self._refill_thread.is_alive():
+                return
+            self._refill_thread = threading.Thread(target=self._refill, name="key-pool", daemon=True)
+            self._refill_thread.start()
+
+    def _refill(self) -> None:
+        while len(self._keys) < self.size:
+            self._keys.extend(generate_keys(self.alphabet, min(self.batch_size, self.size - len(self._keys))))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+# Pool of keys over the printable characters used by the API
+key_pool = KeyPool(string.printable)
@@ -0,0 +1,144 @@
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+import time
+
+from cipher_core import CompiledKey
+from sqlite_store import connect_shared
+
+# Number of compiled keys kept and seconds a key lives after its last use;
+# both can be overridden through environment variables
+KEY_CACHE_SIZE = int(os.environ.get("CIPHER_KEY_CACHE_SIZE", 10_000))
+KEY_TTL = float(os.environ.get("CIPHER_KEY_TTL", 3600.0))
+
+# SQLite file shared by every worker process; keys stay process-local when unset
+STORE_PATH = os.environ.get("CIPHER_KEY_STORE_PATH") or None
+
+# Seconds between expiry refreshes of a shared key, and between purges of
+# expired keys from the shared table
+TOUCH_INTERVAL = 60.0
+PURGE_INTERVAL = 300.0
+
+
+def key_id_for(key: Dict[str, str]) -> str:
+    """
+    Derive a compact ID from the key's content
+    Registering the same key twice yields the same ID.
+    """
+    canonical = json.dumps(sorted(key.items()), ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def validate_key(key: Dict[str, str]) -> None:
+    """Raise ValueError unless the key maps single characters one-to-one"""
+    if not key:
+        raise ValueError("Key must not be empty")
+    if any(len(k) != 1 or len(v) != 1 for k, v in key.items()):
+        raise ValueError("Key must map single characters to single characters")
+    if len(set(key.values())) != len(key):
+        raise ValueError("Key must not map two characters to the same character")
+
+
+class KeyStore:
+    """
+    LRU cache of compiled substitution keys with a size bound and a TTL
+    Every lookup refreshes a key's position and expiry time.
+    With a shared SQLite file the table there is the source of truth: keys
+    registered or deleted by any worker process are seen by all of them, the
+    in-memory LRU only keeps compiled tables, and `max_size` bounds that cache
+    rather than the shared table, which is bounded by the TTL.
+    """
+
+    def __init__(self, max_size: int = KEY_CACHE_SIZE, ttl: float = KEY_TTL, path: Optional[str] = STORE_PATH):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._keys: "OrderedDict[str, Tuple[CompiledKey, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._shared = None
+        self._purged = 0.0
+        if path:
+            self._shared = connect_shared(path)
+            self._shared.execute("CREATE TABLE IF NOT EXISTS keys "
+                                 "(key_id TEXT PRIMARY KEY, key TEXT NOT NULL, expires REAL NOT NULL)")
+            self._shared.commit()
+
+    def register(self, key: Dict[str, str]) -> str:
+        """Compile and store a key, returning its ID"""
+        validate_key(key)
+        key_id = key_id_for(key)
+        with self._lock:
+            self._remember(key_id, self._keys[key_id][0] if key_id in self._keys else CompiledKey(key))
+            if self._shared is not None:
+                now = time.time()
+                self._shared.execute("INSERT OR REPLACE INTO keys VALUES (?, ?, ?)",
+                                     (key_id, json.dumps(key, ensure_ascii=False), now + self.ttl))
+                if now - self._purged > PURGE_INTERVAL:
+                    self._shared.execute("DELETE FROM keys WHERE expires < ?", (now,))
+                    self._purged = now
+                self._shared.commit()
+        return key_id
+
+    def get(self, key_id: str) -> Optional[CompiledKey]:
+        """Return the compiled key, or None if it is unknown or has expired"""
+        with self._lock:
+            if self._shared is not None:
+                return self._get_shared(key_id)
+            entry = self._keys.get(key_id)
+            if entry is None:
+                return None
+            compiled, expires = entry
+            if expires < time.monotonic():
+                del self._keys[key_id]
+                return None
+            self._remember(key_id, compiled)
+            return compiled
+
+    def _get_shared(self, key_id: str) -> Optional[CompiledKey]:
+        row = self._shared.execute("SELECT key, expires FROM keys WHERE key_id = ?", (key_id,)).fetchone()
+        now = time.time()
+        if row is None or row[1] < now:
+            self._keys.pop(key_id, None)
+            return None
+        entry = self._keys.get(key_id)
+        compiled = entry[0] if entry else CompiledKey(json.loads(row[0]))
+        self._remember(key_id, compiled)
+        # Expiry is pushed back at most once per TOUCH_INTERVAL, so lookups
+        # rarely write
+        if row[1] - now < self.ttl - TOUCH_INTERVAL:
+            self._shared.execute("UPDATE keys SET expires = ? WHERE key_id = ?", (now + self.ttl, key_id))
+            self._shared.commit()
+        return compiled
+
+    def _remember(self, key_id: str, compiled: CompiledKey) -> None:
+        self._keys[key_id] = (compiled, time.monotonic() + self.ttl)
+        self._keys.move_to_end(key_id)
+        while len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+
+    @property
+    def shared(self) -> bool:
+        """Whether calls go through the shared SQLite file and may block"""
+        return self._shared is not None
+
+    def delete(self, key_id: str) -> bool:
+        with self._lock:
+            deleted = self._keys.pop(key_id, None) is not None
+            if self._shared is not None:
+                deleted = self._shared.execute("DELETE FROM keys WHERE key_id = ?", (key_id,)).rowcount > 0
+                self._shared.commit()
+            return deleted
+
+    def __len__(self) -> int:
+        if self._shared is not None:
+            with self._lock:
+                return self._shared.execute("SELECT COUNT(*) FROM keys WHERE expires >= ?",
+                                            (time.time(),)).fetchone()[0]
+        return len(self._keys)
+
+
+# Store shared by the API endpoints
+key_store = KeyStore()
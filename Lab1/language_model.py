@@ -0,0 +1,275 @@
+from typing import Dict, FrozenSet, List, Tuple
+from array import array
+from collections import Counter
+from functools import cached_property, lru_cache
+import argparse
+import math
+import mmap
+import os
+import re
+import string
+import struct
+import threading
+import numpy as np
+
+# Quadgrams are scored over 28 classes: the letters a-z (case-folded),
+# whitespace, and one class shared by every other character
+LETTER_CLASSES = 26
+SPACE_CLASS = 26
+OTHER_CLASS = 27
+CLASS_COUNT = 28
+QUADGRAM_COUNT = CLASS_COUNT ** 4
+
+# Weights of the 1-, 2-, 3- and 4-gram estimates in the interpolated model,
+# and of the 1- and 2-gram estimates in the bigram table
+INTERPOLATION_WEIGHTS = (0.05, 0.1, 0.25, 0.6)
+BIGRAM_WEIGHTS = (0.1, 0.9)
+
+# Words seen fewer times than this in the corpus are left out of the word set
+MIN_WORD_COUNT = 2
+
+# Each language is a <language>_corpus.txt and the <language>_model.bin built
+# from it; CIPHER_MODEL_DIR points to another directory of them
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+MODEL_DIR = os.environ.get("CIPHER_MODEL_DIR") or DATA_DIR
+DEFAULT_LANGUAGE = os.environ.get("CIPHER_DEFAULT_LANGUAGE", "english")
+CORPUS_PATH = os.path.join(DATA_DIR, "english_corpus.txt")
+
+# Model file layout: a header, a table of named sections, then the sections,
+# each starting on an 8-byte boundary
+MAGIC = b"CIPHERLM"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct("<8sII")  # magic, version, section count
+_SECTION = struct.Struct("<16sQQ")  # name, offset, length in bytes
+FLOAT_SECTIONS = ("frequencies", "unigrams", "bigrams", "quadgrams")
+
+
+def _class_table() -> bytes:
+    table = bytearray([OTHER_CLASS] * 256)
+    for i, letter in enumerate(string.ascii_lowercase):
+        table[ord(letter)] = i
+        table[ord(letter.upper())] = i
+    for char in string.whitespace:
+        table[ord(char)] = SPACE_CLASS
+    return bytes(table)
+
+
+def _ngram_index(classes) -> int:
+    index = 0
+    for c in classes:
+        index = index * CLASS_COUNT + c
+    return index
+
+
+# bytes.translate table mapping a Latin-1 code point to its quadgram class
+CHAR_CLASSES = _class_table()
+
+
+def corpus_path(language: str) -> str:
+    return os.path.join(MODEL_DIR, f"{language}_corpus.txt")
+
+
+def model_path(language: str) -> str:
+    return os.path.join(MODEL_DIR, f"{language}_model.bin")
+
+
+@lru_cache(maxsize=None)
+def available_languages() -> Tuple[str, ...]:
+    """Languages with a corpus or a built model in MODEL_DIR, listed once per process"""
+    languages = set()
+    for name in os.listdir(MODEL_DIR):
+        match = re.fullmatch(r"([a-z_]+)_(corpus\.txt|model\.bin)", name)
+        if match:
+            languages.add(match.group(1))
+    return tuple(sorted(languages))
+
+
+class LanguageModel:
+    """
+    Character-class quadgram model of a language
+    The log10-probability of a text is the sum, over its characters, of the
+    probability of the character's class given the three classes before it and
+    of the probability of the character itself given its class.
+    Tables are float32 arrays when built from a corpus, and float32 memoryviews
+    of the memory-mapped model file when loaded, so processes share the pages.
+    Attributes:
+        frequencies (array): 256 log-probabilities P(char) indexed by Latin-1
+                             code point
+        unigrams (array): 256 log-probabilities P(char | class) indexed by
+                          Latin-1 code point
+        bigrams (array): 28**2 log-probabilities P(b | a) indexed by a * 28 + b
+        quadgrams (array): Dense 28**4 array of log-probabilities P(d | a, b, c)
+                           indexed by ((a * 28 + b) * 28 + c) * 28 + d
+    """
+
+    def __init__(self, frequencies: array, unigrams: array, bigrams: array, quadgrams: array,
+                 word_data: bytes = b""):
+        self.frequencies = frequencies
+        self.unigrams = unigrams
+        self.bigrams = bigrams
+        self.quadgrams = quadgrams
+        self._word_data = word_data
+
+    @cached_property
+    def words(self) -> FrozenSet[str]:
+        """Lowercase words seen at least MIN_WORD_COUNT times in the corpus"""
+        return frozenset(word for word in bytes(self._word_data).decode("utf-8").split("\n") if word)
+
+    @cached_property
+    def letter_frequencies(self) -> np.ndarray:
+        """Relative frequencies of the letters a-z, case folded"""
+        probs = 10 ** np.frombuffer(self.frequencies, dtype=np.float32).astype(np.float64)
+        letters = probs[ord('A'):ord('Z') + 1] + probs[ord('a'):ord('z') + 1]
+        return letters / letters.sum()
+
+    def frequency_order(self) -> str:
+        """Letters from most to least frequent"""
+        return ''.join(chr(ord('a') + i) for i in np.argsort(-self.letter_frequencies, kind="stable"))
+
+    @classmethod
+    def from_corpus(cls, text: str, smoothing: float = 0.01) -> "LanguageModel":
+        """Count characters and quadgrams of a corpus and turn them into smoothed log-probabilities"""
+        # Gutenberg-style corpora mark italics with _underscores_
+        text = text.replace("_", "")
+        data = text.encode("latin-1", errors="ignore")
+        classes = data.translate(CHAR_CLASSES)
+
+        char_counts = Counter(data)
+        class_counts = Counter(classes)
+        class_sizes = Counter(CHAR_CLASSES)
+        frequencies = array("f", [0.0] * 256)
+        unigrams = array("f", [0.0] * 256)
+        for code in range(256):
+            frequencies[code] = math.log10((char_counts[code] + smoothing) / (len(data) + smoothing * 256))
+            cls_ = CHAR_CLASSES[code]
+            unigrams[code] = math.log10((char_counts[code] + smoothing)
+                                        / (class_counts[cls_] + smoothing * class_sizes[cls_]))
+
+        # Class n-gram counts for n = 1..4, each indexed like the quadgram array
+        ngram_counts = []
+        for n in range(1, 5):
+            ngram_counts.append(Counter(
+                _ngram_index(gram) for gram in zip(*(classes[i:] for i in range(n)))
+            ))
+
+        # Interpolate the conditional probabilities of every order, so contexts
+        # that never occur in the corpus still back off to shorter ones
+        conditional = []
+        for n, counts in enumerate(ngram_counts, start=1):
+            size = CLASS_COUNT ** n
+            context_counts = Counter()
+            for index, count in counts.items():
+                context_counts[index // CLASS_COUNT] += count
+            probs = array("d", [0.0]) * size
+            for index in range(size):
+                probs[index] = (counts[index] + smoothing) / (context_counts[index // CLASS_COUNT] + smoothing * CLASS_COUNT)
+            conditional.append(probs)
+
+        quadgrams = array("f", [0.0]) * QUADGRAM_COUNT
+        p1, p2, p3, p4 = conditional
+        w1, w2, w3, w4 = INTERPOLATION_WEIGHTS
+        for index in range(QUADGRAM_COUNT):
+            prob = (w4 * p4[index] + w3 * p3[index % CLASS_COUNT ** 3]
+                    + w2 * p2[index % CLASS_COUNT ** 2] + w1 * p1[index % CLASS_COUNT])
+            quadgrams[index] = math.log10(prob)
+
+        bigrams = array("f", [0.0]) * CLASS_COUNT ** 2
+        b1, b2 = BIGRAM_WEIGHTS
+        for index in range(CLASS_COUNT ** 2):
+            bigrams[index] = math.log10(b2 * p2[index] + b1 * p1[index % CLASS_COUNT])
+
+        word_counts = Counter(re.findall(r"[^\W\d_]+", text.lower()))
+        words = sorted(word for word, count in word_counts.items() if count >= MIN_WORD_COUNT)
+        return cls(frequencies, unigrams, bigrams, quadgrams, "\n".join(words).encode("utf-8"))
+
+    @classmethod
+    def load(cls, path: str) -> "LanguageModel":
+        """
+        Memory-map a model saved with save()
+        Nothing is read up front: tables are views of the mapping and pages are
+        loaded by the OS as they are touched.
+        Raises:
+            ValueError: If the file is not a model in the current format
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(mapped, 0) if len(mapped) >= _HEADER.size else (b"", 0, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            mapped.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} language model; rebuild it")
+        view = memoryview(mapped)
+        sections = {}
+        for i in range(count):
+            name, offset, length = _SECTION.unpack_from(mapped, _HEADER.size + i * _SECTION.size)
+            section = view[offset:offset + length]
+            name = name.rstrip(b"\0").decode("ascii")
+            sections[name] = section.cast("f") if name in FLOAT_SECTIONS else section
+        return cls(*(sections[name] for name in FLOAT_SECTIONS), sections.get("words", b""))
+
+    def save(self, path: str) -> None:
+        """Write the tables and the word list as named sections (see load())"""
+        sections: List[Tuple[str, bytes]] = [(name, bytes(getattr(self, name))) for name in FLOAT_SECTIONS]
+        sections.append(("words", bytes(self._word_data)))
+        offset = _HEADER.size + len(sections) * _SECTION.size
+        table, body = [], []
+        for name, data in sections:
+            padding = -offset % 8
+            body.append(b"\0" * padding + data)
+            offset += padding
+            table.append(_SECTION.pack(name.encode("ascii"), offset, len(data)))
+            offset += len(data)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(sections)))
+            f.writelines(table)
+            f.writelines(body)
+        os.replace(tmp_path, path)
+
+
+def build_model(language: str) -> LanguageModel:
+    """Build a language's model from its corpus and save it next to the corpus"""
+    with open(corpus_path(language), encoding="utf-8") as f:
+        model = LanguageModel.from_corpus(f.read())
+    model.save(model_path(language))
+    return model
+
+
+_models: Dict[str, LanguageModel] = {}
+_models_lock = threading.Lock()
+
+
+def get_model(language: str = DEFAULT_LANGUAGE) -> LanguageModel:
+    """
+    Return a language's model, loading it on first use in each process
+    The model file is memory-mapped; if it is missing or in an older format
+    it is built from the language's corpus and saved for the next start.
+    Raises:
+        ValueError: If the language has neither a model nor a corpus
+    """
+    model = _models.get(language)
+    if model is not None:
+        return model
+    if language not in available_languages():
+        raise ValueError(f"Unknown language: {language!r} (available: {', '.join(available_languages())})")
+    with _models_lock:
+        if language not in _models:
+            try:
+                _models[language] = LanguageModel.load(model_path(language))
+            except (FileNotFoundError, ValueError):
+                if not os.path.exists(corpus_path(language)):
+                    raise
+                _models[language] = build_model(language)
+        return _models[language]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build language model assets from a corpus")
+    parser.add_argument("languages", nargs="*", help="Languages to build (default: every corpus in MODEL_DIR)")
+    args = parser.parse_args()
+
+    languages = args.languages or [language for language in available_languages()
+                                   if os.path.exists(corpus_path(language))]
+    for language in languages:
+        model = build_model(language)
+        print(f"Wrote {model_path(language)}: {len(model.words)} words, "
+              f"letters by frequency {model.frequency_order()}")
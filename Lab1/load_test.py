@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+import random
+import string
+import time
+from typing import List
+
+import httpx
+
+SMALL_TEXT = "The quick brown fox jumps over the lazy dog. " * 4
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def small_encrypts(client: httpx.AsyncClient, count: int, concurrency: int) -> List[float]:
+    """Send `count` small /caesar/encrypt requests and return their latencies in seconds"""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/caesar/encrypt", json={"text": SMALL_TEXT, "shift": 3})
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    await asyncio.gather(*(one() for _ in range(count)))
+    return latencies
+
+
+async def keep_attacking(client: httpx.AsyncClient, text: str, stop: asyncio.Event) -> int:
+    """
+    Run heavy attacks back to back until `stop` is set; returns how many finished
+    The ciphertext is rotated before every attack so each one misses the result cache.
+    """
+    finished = 0
+    sent = 0
+    while not stop.is_set():
+        sent += 1
+        rotated = text[sent:] + text[:sent]
+        if finished % 2 == 0:
+            response = await client.post("/caesar/attack", json={"text": rotated, "top_k": 3})
+        else:
+            response = await client.post("/monoalphabetic/attack", json={"text": rotated[:5000], "time_limit": 2})
+        if response.status_code == 200:
+            finished += 1
+    return finished
+
+
+async def main(url: str, count: int, concurrency: int, attackers: int, attack_size: int) -> None:
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=120)
+    else:
+        from app import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=120)
+
+    async with client:
+        # Warm up pools and caches
+        await small_encrypts(client, 20, concurrency)
+
+        baseline = await small_encrypts(client, count, concurrency)
+
+        text = ''.join(random.choices(string.ascii_letters + " ", k=attack_size))
+        stop = asyncio.Event()
+        attacks = [asyncio.create_task(keep_attacking(client, text, stop)) for _ in range(attackers)]
+        await asyncio.sleep(0.5)
+        loaded = await small_encrypts(client, count, concurrency)
+        stop.set()
+        finished = sum(await asyncio.gather(*attacks))
+
+    print(f"{'Scenario':<24} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    print("-" * 54)
+    for name, latencies in (("idle", baseline), (f"{attackers} attackers", loaded)):
+        print(f"{name:<24} {percentile(latencies, 0.5) * 1000:9.2f} "
+              f"{percentile(latencies, 0.99) * 1000:9.2f} {max(latencies) * 1000:9.2f}")
+    print(f"\n{finished} attacks completed during the loaded run")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure small-request latency while heavy attacks run")
+    parser.add_argument("--url", default="", help="Server to test (default: the app in-process)")
+    parser.add_argument("--requests", type=int, default=500, help="Small encrypt requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--attackers", type=int, default=2, help="Concurrent attack loops")
+    parser.add_argument("--attack-size", type=int, default=2_000_000, help="Attack ciphertext length")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.requests, args.concurrency, args.attackers, args.attack_size))
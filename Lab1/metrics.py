@@ -0,0 +1,322 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import cProfile
+import functools
+import hmac
+import inspect
+import io
+import os
+import pstats
+import threading
+import time
+
+from fastapi.routing import APIRoute
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = tuple(4 ** i * 256 for i in range(11))  # 256 B to 256 MB
+
+# Requests whose header carries CIPHER_PROFILE_TOKEN are profiled; profiling
+# is off when the token is unset
+PROFILE_HEADER = b"x-profile"
+PROFILE_TOKEN = os.environ.get("CIPHER_PROFILE_TOKEN") or None
+PROFILE_LINES = 40
+
+# cProfile hooks the whole event-loop thread, so profiled requests take turns
+_profile_lock = asyncio.Lock()
+
+STAGES = ("validation", "core", "serialization")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Prometheus counter with labels"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {_number(total)}")
+        return lines
+
+
+class Histogram:
+    """Prometheus histogram with labels and fixed buckets"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [count per bucket, sum, count]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = 'le="%s"' % _number(bound)
+                    lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, values)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labels, values)} {count}")
+        return lines
+
+
+REQUEST_DURATION = Histogram("cipher_request_duration_seconds", "Request latency",
+                             ("method", "path", "status"))
+REQUEST_SIZE = Histogram("cipher_request_size_bytes", "Request body size", ("path",), SIZE_BUCKETS)
+RESPONSE_SIZE = Histogram("cipher_response_size_bytes", "Response body size", ("path",), SIZE_BUCKETS)
+REQUEST_BYTES = Counter("cipher_request_bytes_total", "Request body bytes received", ("path",))
+RESPONSE_BYTES = Counter("cipher_response_bytes_total", "Response body bytes sent", ("path",))
+STAGE_DURATION = Histogram("cipher_stage_duration_seconds",
+                           "Time spent per request in pydantic validation, the cipher core and serialization",
+                           ("path", "stage"))
+
+METRICS = [REQUEST_DURATION, REQUEST_SIZE, RESPONSE_SIZE, REQUEST_BYTES, RESPONSE_BYTES, STAGE_DURATION]
+
+
+def render_metrics(extra: Optional[Dict[str, Tuple[str, str, Dict[Tuple[Tuple[str, str], ...], float]]]] = None) -> str:
+    """
+    Render every metric in the Prometheus text format
+    Parameters:
+        extra (Dict): Values read at scrape time, as
+                      name -> (type, help, {((label, value), ...): value})
+    """
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for name, (kind, help, series) in (extra or {}).items():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in series.items():
+            names = tuple(label for label, _ in labels)
+            values = tuple(value for _, value in labels)
+            lines.append(f"{name}{_labels(names, values)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestTimings:
+    """Per-request stage timings, shared through a context variable"""
+
+    def __init__(self, profiling: bool = False):
+        self.profiling = profiling
+        self.stages = dict.fromkeys(STAGES, 0.0)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+# perf_counter() marks taken by TimedRoute: handler start, endpoint start,
+# endpoint end and handler end
+_marks: ContextVar[Optional[list]] = ContextVar("route_marks", default=None)
+
+
+def profiling() -> bool:
+    """Whether the current request is being profiled"""
+    timings = _current.get()
+    return timings is not None and timings.profiling
+
+
+@contextmanager
+def timed(stage: str):
+    """Add the time spent in the block to the current request's `stage`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _current.get()
+        if timings is not None:
+            timings.stages[stage] += time.perf_counter() - start
+
+
+class TimedRoute(APIRoute):
+    """
+    Route recording validation and serialization time
+    The endpoint is wrapped so its start and end are known: everything the
+    route handler does before it is request parsing and pydantic validation,
+    everything after it is response validation and serialization.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, self._wrap(endpoint), **kwargs)
+
+    @staticmethod
+    def _wrap(endpoint: Callable) -> Callable:
+        if inspect.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def timed_endpoint(*args, **kwargs):
+                current = _marks.get()
+                if current is not None:
+                    current.append(time.perf_counter())
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    if current is not None:
+                        current.append(time.perf_counter())
+            return timed_endpoint
+
+        @functools.wraps(endpoint)
+        def timed_sync_endpoint(*args, **kwargs):
+            current = _marks.get()
+            if current is not None:
+                current.append(time.perf_counter())
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                if current is not None:
+                    current.append(time.perf_counter())
+        return timed_sync_endpoint
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            timings = _current.get()
+            if timings is None:
+                return await handler(request)
+            current = [time.perf_counter()]
+            token = _marks.set(current)
+            try:
+                return await handler(request)
+            finally:
+                current.append(time.perf_counter())
+                _marks.reset(token)
+                if len(current) == 4:
+                    start, endpoint_start, endpoint_end, end = current
+                    timings.stages["validation"] += endpoint_start - start
+                    timings.stages["serialization"] += end - endpoint_end
+                else:
+                    # Validation failed before the endpoint ran
+                    timings.stages["validation"] += current[-1] - current[0]
+        return timed_handler
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, body sizes and stage timings per route
+    Requests sent with an X-Profile header matching CIPHER_PROFILE_TOKEN run
+    under cProfile, one at a time, and get the profile summary back as
+    text/plain instead of their normal response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile_header = dict(scope["headers"]).get(PROFILE_HEADER)
+        profile = PROFILE_TOKEN is not None and profile_header is not None and hmac.compare_digest(
+            profile_header, PROFILE_TOKEN.encode("latin-1"))
+        timings = RequestTimings(profiling=profile)
+        token = _current.set(timings)
+        received = 0
+        sent = 0
+        status = 500
+        start = time.perf_counter()
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal sent, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            if not profile:
+                await send(message)
+
+        profiler = None
+        if profile:
+            await _profile_lock.acquire()
+            profiler = cProfile.Profile()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _profile_lock.release()
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            REQUEST_DURATION.observe(elapsed, scope["method"], path, str(status))
+            REQUEST_SIZE.observe(received, path)
+            RESPONSE_SIZE.observe(sent, path)
+            REQUEST_BYTES.inc(path, amount=received)
+            RESPONSE_BYTES.inc(path, amount=sent)
+            if route is not None:
+                for stage, seconds in timings.stages.items():
+                    STAGE_DURATION.observe(seconds, path, stage)
+
+        if profiler is not None:
+            await self._send_profile(send, profiler, status, elapsed, timings)
+
+    @staticmethod
+    async def _send_profile(send, profiler: cProfile.Profile, status: int, elapsed: float,
+                            timings: RequestTimings) -> None:
+        out = io.StringIO()
+        out.write(f"Response status: {status}\nTotal time: {elapsed * 1000:.3f} ms\n")
+        for stage, seconds in timings.stages.items():
+            out.write(f"{stage}: {seconds * 1000:.3f} ms\n")
+        out.write("\n")
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        body = out.getvalue().encode("utf-8")
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            (b"x-profiled-status", str(status).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
@@ -1,9 +1,12 @@
-from typing import Dict, List, Tuple
-from collections import Counter
+from typing import Dict, List
 from monoalphabetic_decryption import monoalphabetic_decrypt
+from substitution_solver import solve, DEFAULT_RESTARTS, DEFAULT_TIME_LIMIT, DEFAULT_MAX_ITERATIONS
+from language_model import get_model, DEFAULT_LANGUAGE
+from text_stats import frequency_order
+from word_scorer import get_word_scorer, DEFAULT_SAMPLE_SIZE as WORD_SAMPLE_SIZE
 
-# Common letter frequencies in English text (from most to least common)
-ENGLISH_FREQUENCIES = 'ETAOINSHRDLCUMWFGYPBVKJXQZ'.lower()
+# The standalone cipher permutes all 256 Latin-1 characters
+ALPHABET = ''.join(chr(i) for i in range(256))
 
 def get_frequency_order(text: str) -> str:
     """
@@ -13,92 +16,73 @@ def get_frequency_order(text: str) -> str:
     Returns:
         str: Letters ordered by frequency (most to least frequent)
     """
-    # Count only alphabetic characters
-    text = ''.join(c.lower() for c in text if c.isalpha())
-    
-    # Count frequencies
-    frequencies = Counter(text)
-    
-    # Sort letters by frequency (most frequent first)
-    sorted_chars = sorted(frequencies.items(), key=lambda x: (-x[1], x[0]))
-    
-    # Return just the letters in order
-    return ''.join(char for char, _ in sorted_chars)
+    return frequency_order(text)
 
-def calculate_possible_shifts(ciphertext: str) -> List[Tuple[int, float]]:
+def monoalphabetic_attack(ciphertext: str, restarts: int = DEFAULT_RESTARTS,
+                          time_limit: float = DEFAULT_TIME_LIMIT,
+                          max_iterations: int = DEFAULT_MAX_ITERATIONS,
+                          seed: int = None, top_k: int = 1,
+                          language: str = DEFAULT_LANGUAGE) -> List[Dict[str, any]]:
     """
-    Calculate possible shift values based on frequency analysis
-    Parameters:
-        ciphertext (str): The encrypted text to analyze
-    Returns:
-        List[Tuple[int, float]]: List of (shift, match_score) pairs
-    """
-    # Get frequency order of the ciphertext
-    cipher_freq_order = get_frequency_order(ciphertext)
-    
-    possible_shifts = []
-    
-    # Try matching the frequency patterns
-    for i in range(26):
-        match_score = 0
-        for j, letter in enumerate(cipher_freq_order[:6]):  # Check first 6 most common letters
-            expected_pos = ENGLISH_FREQUENCIES.find(chr(((ord(letter) - ord('a') - i) % 26) + ord('a')))
-            if expected_pos < 6:  # If the letter is among the 6 most common in English
-                match_score += 1 - (expected_pos / 6)
-        
-        possible_shifts.append((i, match_score))
-    
-    # Sort by match score, highest first
-    return sorted(possible_shifts, key=lambda x: x[1], reverse=True)
-
-def monoalphabetic_attack(ciphertext: str) -> List[Dict[str, any]]:
-    """
-    Perform a frequency analysis attack on monoalphabetic cipher
+    Recover the substitution key with quadgram-scored hill climbing
+    The distinct keys the restarts end on are ranked by the share of their
+    plaintext covered by dictionary words (`confidence`), then by quadgram score.
     Parameters:
         ciphertext (str): The encrypted text to attack
+        restarts (int): Number of random-restart climbs, run on a process pool
+        time_limit (float): Search budget in seconds
+        max_iterations (int): Key evaluations shared out over all restarts
+        seed (int): Seed for reproducible searches
+        top_k (int): Number of candidate keys to return
+        language (str): Language of the plaintext
     Returns:
-        List[Dict]: List of dictionaries containing shift values and corresponding decrypted text,
-                   ordered by likelihood (most likely first)
+        List[Dict]: Encryption keys with their score, confidence and decrypted
+                    text, most likely first
     """
-    # Get possible shifts based on frequency analysis
-    possible_shifts = calculate_possible_shifts(ciphertext)
-    
-    # Try decryption with each shift, ordered by likelihood
+    result = solve(ciphertext, ALPHABET, restarts=restarts, time_limit=time_limit,
+                   max_iterations=max_iterations, seed=seed, language=language)
+    candidates = result["candidates"]
+    samples = [monoalphabetic_decrypt(ciphertext[:WORD_SAMPLE_SIZE], key) for _, key in candidates]
     results = []
-    for shift, score in possible_shifts:
-        decrypted = monoalphabetic_decrypt(ciphertext, shift)
+    for i, confidence in get_word_scorer(language).prefilter(samples, top_k):
+        score, key = candidates[i]
         results.append({
-            "shift": shift,
-            "likelihood_score": round(score, 3),
-            "plaintext": decrypted
+            "key": key,
+            "score": round(score, 3),
+            "confidence": round(confidence, 3),
+            "plaintext": monoalphabetic_decrypt(ciphertext, key),
+            "iterations": result["iterations"],
         })
-    
     return results
 
 def print_attack_results(results: List[Dict[str, any]]) -> None:
     """
-    Print the results of the frequency analysis attack in a readable format
+    Print the results of the hill-climbing attack in a readable format
     """
-    print("\nFrequency Analysis Attack Results:")
+    print("\nHill Climbing Attack Results:")
     print("-" * 70)
-    print(f"{'Shift':>6} {'Score':>8} {'Decrypted Text':<50}")
-    print("-" * 70)
-    
     for result in results:
-        print(f"{result['shift']:6d} {result['likelihood_score']:8.3f} {result['plaintext'][:50]}")
+        print(f"Score {result['score']:.3f}, confidence {result['confidence']:.3f} "
+              f"after {result['iterations']} key evaluations")
+        print(f"Decrypted text: {result['plaintext'][:200]}")
     print("-" * 70)
 
 if __name__ == "__main__":
     # Test the attack function
-    test_text = "KHOOR Zruog! 123"  # "HELLO World! 123" encrypted with shift=3
-    print(f"Encrypted text: {test_text}")
-    
+    from monoalphabetic_encryption import monoalphabetic_encrypt
+    test_text = ("It was the best of times, it was the worst of times, it was the age of wisdom, "
+                 "it was the age of foolishness, it was the epoch of belief, it was the epoch of "
+                 "incredulity, it was the season of Light, it was the season of Darkness.")
+    encrypted, _ = monoalphabetic_encrypt(test_text)
+    print(f"Encrypted text: {encrypted!r}")
+
     # Show frequency analysis
-    freq_order = get_frequency_order(test_text)
+    freq_order = get_frequency_order(encrypted)
     print(f"\nLetter frequencies in ciphertext (most to least common): {freq_order}")
-    
+    print(f"Letter frequencies in English (most to least common): {get_model().frequency_order()}")
+
     # Perform the attack
-    results = monoalphabetic_attack(test_text)
-    
+    results = monoalphabetic_attack(encrypted, time_limit=5.0, top_k=3)
+
     # Print results
-    print_attack_results(results) 
\ No newline at end of file
+    print_attack_results(results)
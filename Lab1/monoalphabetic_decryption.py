@@ -1,8 +1,5 @@
 from typing import Dict
-
-def create_reverse_substitution_key(substitution_key: Dict[str, str]) -> Dict[str, str]:
-
-    return {v: k for k, v in substitution_key.items()}
+from cipher_core import unsubstitute
 
 def monoalphabetic_decrypt(ciphertext: str, substitution_key: Dict[str, str]) -> str:
     """
@@ -13,25 +10,9 @@ def monoalphabetic_decrypt(ciphertext: str, substitution_key: Dict[str, str]) ->
     Returns:
         str: The decrypted text
     """
-    # Create the reverse substitution key
-    reverse_key = create_reverse_substitution_key(substitution_key)
-    
-    # Decrypt the text using the reverse substitution key
-    decrypted_text = ""
-    try:
-        for char in ciphertext:
-            if char in reverse_key:
-                decrypted_text += reverse_key[char]
-            else:
-                # If character not in key, keep it unchanged
-                decrypted_text += char
-    except Exception as e:
-        print(f"Error during decryption: {e}")
-        print(f"Problem character: {char}")
-        print(f"Reverse key sample: {dict(list(reverse_key.items())[:5])}")
-        raise
-    
-    return decrypted_text
+    # Decrypt with the cached inverse translation table; characters not in
+    # the key are kept unchanged
+    return unsubstitute(ciphertext, substitution_key)
 
 if __name__ == "__main__":
     # Test the decryption function with a sample substitution key
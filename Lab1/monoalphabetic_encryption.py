@@ -1,30 +1,21 @@
 from typing import Dict
-import random
+from cipher_core import substitute
+from key_pool import generate_keys
 
 def create_substitution_key() -> Dict[str, str]:
 
-    # Create list of all possible ASCII characters (0-255)
-    characters = [chr(i) for i in range(256)]
-    # Create a shuffled copy of the characters
-    shuffled = characters.copy()
-    random.shuffle(shuffled)
-    
-    # Create the substitution mapping
-    substitution = {}
-    for original, substituted in zip(characters, shuffled):
-        substitution[original] = substituted
-    
-    return substitution
+    # Permute all 256 Latin-1 characters, drawn from the OS CSPRNG like the
+    # API's key pool (which permutes the printable characters only)
+    characters = ''.join(chr(i) for i in range(256))
+    return generate_keys(characters, 1)[0]
 
 def monoalphabetic_encrypt(plaintext: str) -> tuple[str, Dict[str, str]]:
 
     # Create the substitution key
     substitution_key = create_substitution_key()
     
-    # Encrypt the text using the substitution key
-    encrypted_text = ""
-    for char in plaintext:
-        encrypted_text += substitution_key[char]
+    # Encrypt the text using the compiled substitution table
+    encrypted_text = substitute(plaintext, substitution_key)
     
     return encrypted_text, substitution_key
 
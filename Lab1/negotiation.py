@@ -0,0 +1,123 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is only offered when installed
+    msgpack = None
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/msgpack"
+OCTET_STREAM = "application/octet-stream"
+
+# Media types offered by the cipher and attack endpoints, preferred first
+CIPHER_TYPES = (JSON, MSGPACK, OCTET_STREAM)
+ATTACK_TYPES = (JSON, NDJSON, MSGPACK, OCTET_STREAM)
+
+_ALIASES = {"application/x-msgpack": MSGPACK, "application/vnd.msgpack": MSGPACK,
+            "application/ndjson": NDJSON, "application/jsonl": NDJSON}
+
+
+def _parse_accept(accept: str) -> List[Tuple[str, float]]:
+    ranges = []
+    for part in accept.split(","):
+        media, *params = [piece.strip() for piece in part.split(";")]
+        if not media:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((_ALIASES.get(media.lower(), media.lower()), q))
+    return ranges
+
+
+def negotiate(accept: Optional[str], offered: Sequence[str]) -> str:
+    """
+    Pick the response media type from an Accept header
+    Each offered type gets the quality of the most specific range matching it;
+    ties go to the earlier offered type, so JSON wins for */*.
+    Raises:
+        HTTPException: 406 when none of the offered types is acceptable
+    """
+    offered = [media for media in offered if media != MSGPACK or msgpack is not None]
+    if not accept:
+        return offered[0]
+    ranges = _parse_accept(accept)
+    best, best_q = None, 0.0
+    for media in offered:
+        main = media.split("/")[0]
+        matches = [(3 if r == media else 2 if r == f"{main}/*" else 1, q)
+                   for r, q in ranges if r in (media, f"{main}/*", "*/*")]
+        if matches and max(matches)[1] > best_q:
+            best, best_q = media, max(matches)[1]
+    if best is None:
+        raise HTTPException(status_code=406, detail=f"Acceptable media types: {', '.join(offered)}")
+    return best
+
+
+def text_bytes(text: str) -> Tuple[bytes, str]:
+    """
+    Raw bytes of a cipher result: one byte per character when every character
+    fits in Latin-1, as the mod-256 ciphers produce, UTF-8 otherwise
+    """
+    try:
+        return text.encode("latin-1"), "latin-1"
+    except UnicodeEncodeError:
+        return text.encode("utf-8"), "utf-8"
+
+
+def _header_json(value: object) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def render_content(content: dict, media_type: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Render a JSON-style object as JSON or MessagePack"""
+    if media_type == MSGPACK:
+        return Response(msgpack.packb(content), media_type=MSGPACK, headers=headers)
+    return JSONResponse(content, headers=headers)
+
+
+def render_cipher(result: str, media_type: str, **fields) -> Response:
+    """
+    Render an encrypt/decrypt result
+    With application/octet-stream the body is the raw result (see text_bytes)
+    and the other fields, such as the key, travel as X-Key / X-Key-Id headers.
+    """
+    fields = {name: value for name, value in fields.items() if value is not None}
+    if media_type == OCTET_STREAM:
+        body, encoding = text_bytes(result)
+        headers = {"X-Text-Encoding": encoding}
+        if "key" in fields:
+            headers["X-Key"] = _header_json(fields["key"])
+        if "key_id" in fields:
+            headers["X-Key-Id"] = fields["key_id"]
+        return Response(body, media_type=OCTET_STREAM, headers=headers)
+    return render_content({"result": result, **fields}, media_type)
+
+
+def render_results(results: List[dict], media_type: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Render attack candidates
+    NDJSON streams one candidate per line; application/octet-stream sends the
+    best candidate's raw plaintext with the rest of it in an X-Attack-Result header.
+    """
+    headers = dict(headers or {})
+    if media_type == NDJSON:
+        lines = (json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+        return StreamingResponse(lines, media_type=NDJSON, headers=headers)
+    if media_type == OCTET_STREAM:
+        best = dict(results[0]) if results else {}
+        body, encoding = text_bytes(best.pop("decrypted", ""))
+        headers["X-Text-Encoding"] = encoding
+        headers["X-Attack-Result"] = _header_json(best)
+        return Response(body, media_type=OCTET_STREAM, headers=headers)
+    return render_content({"results": results}, media_type, headers)
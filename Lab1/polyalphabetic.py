@@ -0,0 +1,146 @@
+from typing import List, Tuple
+import numpy as np
+
+from cipher_core import alpha_byte_table, beaufort_byte_table
+
+# Polyalphabetic variants: Vigenère adds the key letter, Beaufort subtracts the
+# plaintext from it, autokey extends the key with the plaintext itself
+VARIANTS = ("vigenere", "beaufort", "autokey")
+
+
+def key_shifts(key: str) -> List[int]:
+    """
+    Convert a key word to its letter shifts (A = 0)
+    Raises:
+        ValueError: If the key is empty or holds anything but the letters A-Z
+    """
+    if not key or not key.isascii() or not key.isalpha():
+        raise ValueError("Key must be a non-empty word of the letters A-Z")
+    return [ord(char) - ord('a') for char in key.lower()]
+
+
+def letter_mask(codes: np.ndarray) -> np.ndarray:
+    """Mask of the ASCII letters A-Z and a-z in an array of character codes"""
+    folded = codes | 32
+    return (folded >= ord('a')) & (folded <= ord('z'))
+
+
+def _split(text: str) -> Tuple[np.ndarray, str, np.ndarray]:
+    # Latin-1 text is handled one byte per character, anything else as UTF-32
+    try:
+        codes, encoding = np.frombuffer(text.encode('latin-1'), dtype=np.uint8), 'latin-1'
+    except UnicodeEncodeError:
+        codes, encoding = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32), 'utf-32-le'
+    return codes.copy(), encoding, np.flatnonzero(letter_mask(codes))
+
+
+def _join(codes: np.ndarray, encoding: str) -> str:
+    return codes.tobytes().decode(encoding, 'surrogatepass')
+
+
+def apply_periodic(text: str, tables: List[bytes]) -> str:
+    """
+    Encrypt or decrypt with one byte table per key letter
+    Only letters advance the key; other characters are kept unchanged. Letter
+    i is translated with table i mod len(tables), one strided column at a time.
+    Parameters:
+        text (str): Text to transform
+        tables (List[bytes]): 256-entry letter tables, one per key position
+    Returns:
+        str: Transformed text
+    """
+    codes, encoding, positions = _split(text)
+    letters = codes[positions]
+    period = len(tables)
+    for i, table in enumerate(tables):
+        column = letters[i::period]
+        column[...] = np.frombuffer(table, dtype=np.uint8)[column]
+    codes[positions] = letters
+    return _join(codes, encoding)
+
+
+def vigenere_encrypt(text: str, key: str) -> str:
+    return apply_periodic(text, [alpha_byte_table(shift) for shift in key_shifts(key)])
+
+
+def vigenere_decrypt(text: str, key: str) -> str:
+    return apply_periodic(text, [alpha_byte_table(-shift % 26) for shift in key_shifts(key)])
+
+
+def beaufort_encrypt(text: str, key: str) -> str:
+    return apply_periodic(text, [beaufort_byte_table(shift) for shift in key_shifts(key)])
+
+
+# Beaufort is reciprocal: the same tables decrypt
+beaufort_decrypt = beaufort_encrypt
+
+
+def _letter_offsets(letters: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    base = np.where(letters < ord('a'), ord('A'), ord('a'))
+    return letters.astype(np.int64) - base, base
+
+
+def autokey_encrypt(text: str, key: str) -> str:
+    """
+    Vigenère autokey: the key word is followed by the plaintext letters
+    """
+    shifts = key_shifts(key)
+    codes, encoding, positions = _split(text)
+    offsets, base = _letter_offsets(codes[positions])
+    stream = np.concatenate((shifts, offsets))[:len(offsets)]
+    codes[positions] = (offsets + stream) % 26 + base
+    return _join(codes, encoding)
+
+
+def autokey_decrypt(text: str, key: str) -> str:
+    """
+    Invert the autokey cipher without a letter-by-letter loop
+    Letter i is c[i] - p[i - L] for a key of length L, so in each column of
+    the letters laid out L wide, p[m] = c[m] - p[m - 1] with p[-1] the key
+    letter. Unrolled, p[m] = (-1)^m (sum over t <= m of (-1)^t c[t] - key),
+    a cumulative sum down the columns.
+    """
+    shifts = np.array(key_shifts(key))
+    period = len(shifts)
+    codes, encoding, positions = _split(text)
+    offsets, base = _letter_offsets(codes[positions])
+    rows = -(-len(offsets) // period)
+    grid = np.zeros(rows * period, dtype=np.int64)
+    grid[:len(offsets)] = offsets
+    grid = grid.reshape(rows, period)
+    signs = np.where(np.arange(rows) % 2 == 0, 1, -1)[:, None]
+    plain = (signs * (np.cumsum(signs * grid, axis=0) - shifts)) % 26
+    codes[positions] = plain.ravel()[:len(offsets)] + base
+    return _join(codes, encoding)
+
+
+CIPHERS = {
+    "vigenere": (vigenere_encrypt, vigenere_decrypt),
+    "beaufort": (beaufort_encrypt, beaufort_decrypt),
+    "autokey": (autokey_encrypt, autokey_decrypt),
+}
+
+
+def encrypt(text: str, key: str, variant: str = "vigenere") -> str:
+    """
+    Encrypt text with a polyalphabetic cipher
+    Parameters:
+        text (str): The text to encrypt
+        key (str): Key word of the letters A-Z
+        variant (str): One of VARIANTS
+    Returns:
+        str: The encrypted text; case is preserved and non-letters are unchanged
+    """
+    return CIPHERS[variant][0](text, key)
+
+
+def decrypt(text: str, key: str, variant: str = "vigenere") -> str:
+    """Decrypt text encrypted with encrypt() and the same key and variant"""
+    return CIPHERS[variant][1](text, key)
+
+
+if __name__ == "__main__":
+    message = "Attack at dawn! Défendez l'est."
+    for variant in VARIANTS:
+        ciphertext = encrypt(message, "LEMON", variant)
+        print(f"{variant:>9}: {ciphertext} -> {decrypt(ciphertext, 'LEMON', variant)}")
@@ -0,0 +1,137 @@
+from typing import Dict, Optional
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+import time
+
+from sqlite_store import connect_shared
+
+# Bytes of serialized results kept in memory, and the largest single result
+# worth keeping there; both can be overridden through environment variables
+MEMORY_LIMIT = int(os.environ.get("CIPHER_RESULT_CACHE_BYTES", 64 * 1024 * 1024))
+MAX_ENTRY_SIZE = int(os.environ.get("CIPHER_RESULT_CACHE_MAX_ENTRY", 8 * 1024 * 1024))
+
+# SQLite file for the on-disk tier, which worker processes share; the disk
+# tier is off when unset. The oldest results are dropped once it holds more
+# than DISK_LIMIT bytes, checked every DISK_CHECK_INTERVAL stores.
+DISK_PATH = os.environ.get("CIPHER_RESULT_CACHE_PATH") or None
+DISK_LIMIT = int(os.environ.get("CIPHER_RESULT_CACHE_DISK_BYTES", 1024 * 1024 * 1024))
+DISK_CHECK_INTERVAL = 100
+
+
+def result_key(kind: str, text: str, params: Dict[str, object]) -> str:
+    """
+    Content address of an attack result: a digest of the attack kind, its
+    parameters and the ciphertext
+    """
+    digest = hashlib.sha256()
+    digest.update(kind.encode("utf-8") + b"\0")
+    digest.update(json.dumps(params, sort_keys=True).encode("utf-8") + b"\0")
+    digest.update(text.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of serialized attack results
+    The memory tier is an LRU bounded by the total size of the stored values;
+    the optional SQLite tier keeps results across restarts, bounded by
+    `disk_limit` bytes with the oldest stored results dropped first, and disk
+    hits are copied back into memory.
+    Attributes:
+        stats (Dict[str, int]): Hit, miss, store and eviction counters
+    """
+
+    def __init__(self, memory_limit: int = MEMORY_LIMIT, max_entry_size: int = MAX_ENTRY_SIZE,
+                 disk_path: Optional[str] = DISK_PATH, disk_limit: int = DISK_LIMIT):
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.max_entry_size = max_entry_size
+        self.memory_bytes = 0
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self._disk = None
+        if disk_path:
+            self._disk = connect_shared(disk_path)
+            self._disk.execute("CREATE TABLE IF NOT EXISTS results "
+                               "(key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)")
+            self._disk.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+            self._disk.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored result, or None on a miss"""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return value
+            if self._disk is not None:
+                row = self._disk.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.stats["disk_hits"] += 1
+                    self._remember(key, row[0])
+                    return row[0]
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: bytes) -> None:
+        """Store a serialized result in both tiers"""
+        with self._lock:
+            self.stats["stores"] += 1
+            self._remember(key, value)
+            if self._disk is not None:
+                self._disk.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (key, value, time.time()))
+                if self.stats["stores"] % DISK_CHECK_INTERVAL == 0:
+                    self._trim_disk()
+                self._disk.commit()
+
+    def _trim_disk(self) -> None:
+        # Keep the newest results that fit in disk_limit bytes
+        row = self._disk.execute("SELECT created FROM (SELECT created, SUM(LENGTH(value)) OVER "
+                                 "(ORDER BY created DESC) AS stored FROM results) WHERE stored > ? "
+                                 "LIMIT 1", (self.disk_limit,)).fetchone()
+        if row is not None:
+            deleted = self._disk.execute("DELETE FROM results WHERE created <= ?", (row[0],)).rowcount
+            self.stats["evictions"] += deleted
+
+    def _remember(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_entry_size:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= len(old)
+        self._memory[key] = value
+        self.memory_bytes += len(value)
+        while self.memory_bytes > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+            self.stats["evictions"] += 1
+
+    @property
+    def shared(self) -> bool:
+        """Whether calls go through the SQLite tier and may block"""
+        return self._disk is not None
+
+    def clear(self) -> None:
+        """Drop every stored result from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self.memory_bytes = 0
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM results")
+                self._disk.commit()
+
+    def info(self) -> Dict[str, object]:
+        """Counters and current memory use"""
+        with self._lock:
+            return dict(self.stats, memory_entries=len(self._memory), memory_bytes=self.memory_bytes,
+                        memory_limit=self.memory_limit, disk=self._disk is not None)
+
+
+# Cache shared by the attack endpoints
+result_cache = ResultCache()
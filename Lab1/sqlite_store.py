@@ -0,0 +1,13 @@
+import sqlite3
+
+
+def connect_shared(path: str) -> sqlite3.Connection:
+    """
+    Open an SQLite database that several threads and worker processes use
+    WAL mode lets readers proceed while one process writes; writers wait up
+    to 30 seconds for each other instead of failing.
+    """
+    connection = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
@@ -0,0 +1,92 @@
+from typing import AsyncIterator, Callable
+import asyncio
+import codecs
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from metrics import timed
+
+# Size of the pieces request bodies are transformed in
+CHUNK_SIZE = 64 * 1024
+
+
+async def rechunk(stream: AsyncIterator[bytes], chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Regroup an async byte stream into chunks of `chunk_size` bytes
+    Only the final chunk may be shorter; at most one chunk is buffered at a time.
+    """
+    buffer = bytearray()
+    async for piece in stream:
+        buffer += piece
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+async def decode_stream(stream: AsyncIterator[bytes], chunk_size: int = CHUNK_SIZE,
+                        encoding: str = "utf-8", errors: str = "replace") -> AsyncIterator[str]:
+    """
+    Decode a streamed body into text chunks of at most `chunk_size` bytes each
+    Multi-byte characters split across chunk boundaries are held back by an
+    incremental decoder until they are complete. Invalid bytes become U+FFFD
+    by default: the response may already be under way when they arrive, so
+    they cannot be answered with an error status.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    async for chunk in rechunk(stream, chunk_size):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+async def transform_stream(stream: AsyncIterator[bytes], transform: Callable[[str], str],
+                           chunk_size: int = CHUNK_SIZE, encoding: str = "utf-8") -> AsyncIterator[bytes]:
+    """
+    Apply a character-wise text transform to a streamed body, chunk by chunk
+    Memory use is bounded by `chunk_size` whatever the length of the stream.
+    Parameters:
+        stream (AsyncIterator[bytes]): Encoded input, e.g. Request.stream()
+        transform (Callable[[str], str]): Function applied to each decoded chunk
+        chunk_size (int): Number of input bytes transformed at a time
+        encoding (str): Encoding of both the input and the output; invalid input
+                        bytes are replaced with U+FFFD
+    Returns:
+        AsyncIterator[bytes]: The encoded, transformed chunks
+    """
+    async for text in decode_stream(stream, chunk_size, encoding):
+        with timed("core"):
+            chunk = transform(text).encode(encoding)
+        yield chunk
+
+
+class TransformStreamingResponse(StreamingResponse):
+    """
+    Streams `transform` applied to the request body back to the client
+    StreamingResponse listens for client disconnects on the same ASGI receive
+    channel the request body arrives on, which would swallow body chunks while
+    the response is already being written. The listener is therefore only
+    started once the whole body has been read.
+    """
+
+    def __init__(self, request: Request, transform: Callable[[str], str], chunk_size: int = CHUNK_SIZE,
+                 media_type: str = "text/plain; charset=utf-8"):
+        self.body_read = asyncio.Event()
+        content = transform_stream(self._read_body(request), transform, chunk_size)
+        super().__init__(content, media_type=media_type)
+
+    async def _read_body(self, request: Request) -> AsyncIterator[bytes]:
+        try:
+            async for piece in request.stream():
+                yield piece
+        finally:
+            self.body_read.set()
+
+    async def listen_for_disconnect(self, receive) -> None:
+        await self.body_read.wait()
+        await super().listen_for_disconnect(receive)
@@ -0,0 +1,219 @@
+from typing import Dict, List, Optional, Tuple
+import random
+import time
+import numpy as np
+
+from executor import map_process, DEFAULT_TIMEOUT
+from language_model import CHAR_CLASSES, CLASS_COUNT, DEFAULT_LANGUAGE, get_model
+from text_stats import TextStats, to_codes
+from word_scorer import get_word_scorer
+
+# Default search budget
+DEFAULT_RESTARTS = 8
+DEFAULT_TIME_LIMIT = 10.0  # seconds
+DEFAULT_MAX_ITERATIONS = 200_000  # key evaluations over all restarts
+DEFAULT_PATIENCE = 2_000  # failed swaps before a climb counts as converged
+DEFAULT_SAMPLE_SIZE = 2_000  # ciphertext characters used for scoring
+START_CANDIDATES = 4  # perturbed keys drawn per random restart
+
+class KeyScorer:
+    """
+    Scores decryption keys for a fixed ciphertext sample
+    A key is a list giving, for every position in `alphabet`, the Latin-1 code
+    point of the plaintext character that ciphertext character decrypts to.
+    Scores come from the quadgram model of `language`; bigram_score() is a
+    cheaper estimate from the sample's bigram counts and the bigram table.
+    """
+
+    def __init__(self, sample: str, alphabet: str, language: str = DEFAULT_LANGUAGE):
+        model = get_model(language)
+        self.language = language
+        self.quadgrams = model.quadgrams
+        self.unigrams = model.unigrams
+        self.frequencies = model.frequencies
+        self.bigrams = np.frombuffer(model.bigrams, dtype=np.float32).reshape(CLASS_COUNT, CLASS_COUNT)
+        positions = np.full(256, -1, dtype=np.int16)
+        alphabet_codes, _ = to_codes(alphabet)
+        positions[alphabet_codes] = np.arange(len(alphabet_codes))
+        # Characters outside the alphabet are never substituted, so they do not
+        # take part in the search; the statistics count alphabet positions
+        codes = positions[to_codes(sample)[0]]
+        codes = codes[codes >= 0].astype(np.uint8)
+        self.codes = codes.tobytes()
+        stats = TextStats(order=2).update_codes(codes)
+        self.used = np.flatnonzero(stats.unigrams).tolist()
+        self.counts = [(i, int(stats.unigrams[i])) for i in self.used]
+        self.pair_counts = stats.bigrams.reshape(256, 256)[np.ix_(self.used, self.used)]
+
+    def score(self, key: List[int]) -> float:
+        """Sum of quadgram and character log-probabilities of the decrypted sample"""
+        classes = self.codes.translate(bytes(CHAR_CLASSES[code] for code in key).ljust(256, b"\0"))
+        q = self.quadgrams
+        n = CLASS_COUNT
+        total = sum(q[((a * n + b) * n + c) * n + d]
+                    for a, b, c, d in zip(classes, classes[1:], classes[2:], classes[3:]))
+        u = self.unigrams
+        return total + sum(count * u[key[i]] for i, count in self.counts)
+
+    def decrypt(self, key: List[int]) -> str:
+        """The sample's alphabet characters decrypted with `key`"""
+        return self.codes.translate(bytes(key).ljust(256, b"\0")).decode("latin-1")
+
+    def bigram_score(self, key: List[int]) -> float:
+        """Log-probability estimate of the decrypted sample from its bigram counts"""
+        classes = [CHAR_CLASSES[key[i]] for i in self.used]
+        u = self.unigrams
+        return (float((self.pair_counts * self.bigrams[np.ix_(classes, classes)]).sum())
+                + sum(count * u[key[i]] for i, count in self.counts))
+
+
+def frequency_key(scorer: KeyScorer, alphabet: str) -> List[int]:
+    """
+    Initial key pairing ciphertext characters with plaintext characters of the
+    same frequency rank
+    """
+    by_count = [i for i, _ in sorted(scorer.counts, key=lambda item: -item[1])]
+    plain_by_prob = sorted((ord(char) for char in alphabet), key=lambda code: -scorer.frequencies[code])
+    key = [None] * len(alphabet)
+    for i, code in zip(by_count, plain_by_prob):
+        key[i] = code
+    remaining = iter(plain_by_prob[len(by_count):])
+    for i in range(len(alphabet)):
+        if key[i] is None:
+            key[i] = next(remaining)
+    return key
+
+
+def start_keys(scorer: KeyScorer, alphabet: str, restarts: int, rng: random.Random,
+               candidates: int = START_CANDIDATES) -> List[List[int]]:
+    """
+    Starting keys for the restarts: the frequency-matched key, then randomly
+    perturbed copies of it. `candidates` copies are drawn per restart; the
+    half with the best dictionary-word coverage is kept before the bigram
+    score picks the starts, so the quadgram climbs begin from the most
+    readable keys.
+    """
+    base = frequency_key(scorer, alphabet)
+    pool = []
+    for _ in range((restarts - 1) * candidates):
+        start = list(base)
+        for _ in range(max(len(scorer.used), 1)):
+            i = rng.choice(scorer.used) if scorer.used else 0
+            j = rng.randrange(len(alphabet))
+            start[i], start[j] = start[j], start[i]
+        pool.append(start)
+    if pool:
+        kept = get_word_scorer(scorer.language).prefilter([scorer.decrypt(start) for start in pool],
+                                                          max(len(pool) // 2, restarts - 1))
+        pool = sorted((pool[i] for i, _ in kept), key=lambda start: -scorer.bigram_score(start))
+    return [base] + pool[:restarts - 1]
+
+
+def climb(sample: str, alphabet: str, start: List[int], seed: int, deadline: float,
+          max_iterations: int, language: str = DEFAULT_LANGUAGE,
+          patience: int = DEFAULT_PATIENCE) -> Tuple[float, List[int], int]:
+    """
+    Swap-based hill climbing from `start`
+    Two key entries are swapped at random and the swap is kept only if it
+    improves the score. The climb stops after `patience` failed swaps in a row,
+    after `max_iterations` evaluations or at `deadline` (a time.time() value).
+    Returns:
+        Tuple[float, List[int], int]: Best score, best key and evaluations used
+    """
+    rng = random.Random(seed)
+    scorer = KeyScorer(sample, alphabet, language)
+    key = list(start)
+    best = scorer.score(key)
+    used = scorer.used
+    size = len(alphabet)
+    if not used or size < 2:
+        return best, key, 1
+
+    iterations = 1
+    stale = 0
+    while iterations < max_iterations and stale < patience and time.time() < deadline:
+        p = rng.randrange(len(used))
+        i = used[p]
+        # Half of the swaps exchange two used characters, the rest try a new
+        # plaintext character for `i`; `j` is drawn from the other entries
+        if len(used) > 1 and rng.random() < 0.5:
+            q = rng.randrange(len(used) - 1)
+            j = used[q + (q >= p)]
+        else:
+            j = rng.randrange(size - 1)
+            j += j >= i
+        key[i], key[j] = key[j], key[i]
+        score = scorer.score(key)
+        iterations += 1
+        if score > best:
+            best = score
+            stale = 0
+        else:
+            key[i], key[j] = key[j], key[i]
+            stale += 1
+    return best, key, iterations
+
+
+def solve(ciphertext: str, alphabet: str, restarts: int = DEFAULT_RESTARTS,
+          time_limit: float = DEFAULT_TIME_LIMIT, max_iterations: int = DEFAULT_MAX_ITERATIONS,
+          sample_size: int = DEFAULT_SAMPLE_SIZE, inline: bool = False,
+          seed: Optional[int] = None, language: str = DEFAULT_LANGUAGE) -> Dict[str, any]:
+    """
+    Recover a monoalphabetic substitution key with hill climbing and random restarts
+    Restarts run in parallel on a process pool; the first restart starts from the
+    frequency-matched key, the others from randomly perturbed copies of it.
+    Parameters:
+        ciphertext (str): The encrypted text to attack
+        alphabet (str): Characters the substitution permutes
+        restarts (int): Number of independent climbs
+        time_limit (float): Wall-clock budget in seconds for the whole search
+        max_iterations (int): Key evaluations shared out over all restarts
+        sample_size (int): Number of ciphertext characters used for scoring
+        inline (bool): Run the restarts in the calling thread instead of the
+                       shared process pool, where they count towards its
+                       queue depth
+        seed (int): Seed for reproducible searches
+        language (str): Language of the plaintext, selecting the model
+    Returns:
+        Dict: "key" (encryption key, plaintext -> ciphertext character),
+              "score", "plaintext", "iterations", "restarts" and "candidates",
+              the distinct (score, key) results of the restarts, best first;
+              when the sample holds no character of the alphabet, the key
+              and candidates are empty and the score is None
+    """
+    sample = ciphertext[:sample_size]
+    deadline = time.time() + time_limit
+    rng = random.Random(seed)
+
+    # Map (or build) the model before the workers use it; they map the same
+    # file and share its pages
+    scorer = KeyScorer(sample, alphabet, language)
+    if not scorer.used:
+        # No character of the alphabet to recover a key for
+        return {"key": {}, "score": None, "plaintext": ciphertext, "iterations": 0,
+                "restarts": 0, "candidates": []}
+    starts = start_keys(scorer, alphabet, restarts, rng)
+
+    budget = max(max_iterations // max(restarts, 1), 1)
+    jobs = [(sample, alphabet, start, rng.getrandbits(32), deadline, budget, language) for start in starts]
+
+    if inline:
+        outcomes = [climb(*job) for job in jobs]
+    else:
+        outcomes = map_process(climb, *zip(*jobs), timeout=time_limit + DEFAULT_TIMEOUT)
+
+    candidates = {}
+    for score, found, _ in sorted(outcomes, key=lambda outcome: -outcome[0]):
+        candidates.setdefault(tuple(found), score)
+    best_key, best_score = next(iter(candidates.items()))
+    key = {chr(code): alphabet[i] for i, code in enumerate(best_key)}
+    plaintext = ciphertext.translate({ord(alphabet[i]): code for i, code in enumerate(best_key)})
+    return {
+        "key": key,
+        "score": best_score,
+        "plaintext": plaintext,
+        "iterations": sum(outcome[2] for outcome in outcomes),
+        "restarts": len(outcomes),
+        "candidates": [(score, {chr(code): alphabet[i] for i, code in enumerate(found)})
+                       for found, score in candidates.items()],
+    }
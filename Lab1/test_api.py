@@ -0,0 +1,207 @@
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ["CIPHER_JOB_STORE_PATH"] = os.path.join(tempfile.mkdtemp(), "jobs.db")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import executor
+from app import app
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("text", ["", "ééé", "☃"])
+@pytest.mark.parametrize("accept", ["application/json", "application/x-ndjson"])
+def test_caesar_attack_without_letters(text, accept):
+    response = client.post("/caesar/attack", json={"text": text, "top_k": 3}, headers={"Accept": accept})
+    assert response.status_code == 200
+    assert "Infinity" not in response.text
+    if accept == "application/json":
+        assert all(result["score"] is None for result in response.json()["results"])
+
+
+def test_attack_not_modified_only_when_cached():
+    request = {"text": "Wkh vhfuhw phhwlqj lv dw qrrq, " * 3, "include": "none"}
+    assert client.post("/caesar/attack", json=request, headers={"If-None-Match": "*"}).status_code == 200
+    etag = client.post("/caesar/attack", json=request).headers["ETag"]
+    assert client.post("/caesar/attack", json=request, headers={"If-None-Match": etag}).status_code == 304
+    other = dict(request, top_k=2)
+    assert client.post("/caesar/attack", json=other, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_unseeded_solver_results_are_not_tagged():
+    request = {"text": "Wkh vhfuhw phhwlqj lv dw qrrq", "restarts": 1, "time_limit": 0.5}
+    response = client.post("/monoalphabetic/attack", json=request, headers={"If-None-Match": "*"})
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+
+def test_solver_restarts_count_towards_queue_depth(monkeypatch):
+    monkeypatch.setitem(executor._in_flight, executor.PROCESS, executor.MAX_QUEUE_DEPTH)
+    request = {"text": "Wkh vhfuhw phhwlqj lv dw qrrq", "restarts": 2, "time_limit": 0.5, "seed": 1}
+    response = client.post("/monoalphabetic/attack", json=request)
+    assert response.status_code == 503
+    assert executor._in_flight[executor.PROCESS] == executor.MAX_QUEUE_DEPTH
+
+
+def test_batch_with_more_workers_than_queue_slots(monkeypatch):
+    import batch
+    monkeypatch.setattr(batch, "PROCESS_WORKERS", executor.MAX_QUEUE_DEPTH // 2 + 8)
+    monkeypatch.setattr(batch, "POOL_MIN_CHARS", 0)
+    monkeypatch.setattr(batch, "SLICE_CHARS", 10)
+    items = [{"op": "caesar_encrypt", "text": f"Hello {i:05d}", "shift": 3} for i in range(3 * executor.MAX_QUEUE_DEPTH)]
+    response = client.post("/batch", json={"items": items})
+    assert response.status_code == 200
+    assert response.json()["results"][5]["result"] == "Khoor#33338"
+
+@pytest.mark.parametrize("body", [b"abc\xff\xfedef", b"a" * 100_000 + b"\xc3"])
+def test_stream_with_invalid_utf8(body):
+    response = client.post("/caesar/encrypt/stream?shift=3", content=body)
+    assert response.status_code == 200
+    text = body.decode("utf-8", "replace")
+    assert response.text == client.post("/caesar/encrypt", json={"text": text, "shift": 3}).json()["result"]
+
+
+def test_profiling_needs_configured_token(monkeypatch):
+    request = {"text": "Hello", "shift": 3}
+    response = client.post("/caesar/encrypt", json=request, headers={"X-Profile": "1"})
+    assert response.json() == {"result": "Khoor"}
+    monkeypatch.setattr("metrics.PROFILE_TOKEN", "secret")
+    assert client.post("/caesar/encrypt", json=request, headers={"X-Profile": "1"}).json() == {"result": "Khoor"}
+    response = client.post("/caesar/encrypt", json=request, headers={"X-Profile": "secret"})
+    assert response.headers["X-Profiled-Status"] == "200"
+
+
+def test_job_limit_ignores_client_supplied_ids():
+    statuses = [client.post("/jobs/caesar", json={"text": "Khoor"}, headers={"X-Client-Id": str(i)}).status_code
+                for i in range(5)]
+    assert statuses == [202, 202, 202, 202, 429]
+    for job in client.get("/jobs").json()["jobs"]:
+        assert client.delete(f"/jobs/{job['job_id']}").json()["status"] == "cancelled"
+
+
+def test_job_fails_when_pools_stay_busy(tmp_path):
+    from jobs import JobScheduler, JobStore, FAILED
+
+    class BusyJob:
+        def start(self, text, params):
+            return {}
+
+        def step(self, text, params, state, deadline):
+            raise executor.ExecutorBusy(executor.PROCESS)
+
+        def done(self, params, state):
+            return False
+
+    async def run_until_finished():
+        store = JobStore(str(tmp_path / "jobs.db"))
+        job_id = store.create("busy", "test", "text", {})
+        scheduler = JobScheduler(store, {"busy": BusyJob()}, busy_retries=1)
+        scheduler.start()
+        try:
+            for _ in range(100):
+                job = store.get(job_id)
+                if job["status"] == FAILED:
+                    return job
+                await asyncio.sleep(0.1)
+        finally:
+            await scheduler.stop()
+
+    job = asyncio.run(run_until_finished())
+    assert job["status"] == FAILED and "ExecutorBusy" in job["error"]
+
+
+@pytest.mark.parametrize("text", ["", "ééé"])
+def test_monoalphabetic_attack_without_alphabet_characters(text):
+    request = {"text": text, "restarts": 2, "time_limit": 0.5, "seed": 1}
+    response = client.post("/monoalphabetic/attack", json=request)
+    assert response.status_code == 200
+    assert response.json() == {"results": []}
+
+
+def test_climb_with_single_symbol_alphabet_stops():
+    from substitution_solver import climb
+    score, key, iterations = climb("aaaa", "a", [ord("a")], 0, time.time() + 30, 100)
+    assert key == [ord("a")] and iterations == 1
+
+
+@pytest.mark.parametrize("order", [2, 3])
+def test_text_stats_counts_ngrams_across_chunks(order):
+    from text_stats import TextStats
+    text = "The secret meeting is at noon, née Zoë. " * 7
+    whole = TextStats(text, order=order)
+    chunked = TextStats(order=order)
+    for start, end in [(0, 1), (1, 2), (2, 5), (5, 6), (6, 100), (100, len(text))]:
+        chunked.update(text[start:end])
+    assert chunked.total == whole.total == len(text)
+    assert (chunked.unigrams == whole.unigrams).all()
+    assert (chunked.bigrams == whole.bigrams).all()
+    assert chunked.bigrams.sum() == len(text) - 1
+    assert (chunked.trigram_codes == whole.trigram_codes).all()
+    assert (chunked.trigram_counts == whole.trigram_counts).all()
+    assert chunked.trigram_counts.sum() == (len(text) - 2 if order == 3 else 0)
+
+
+def reference_polyalphabetic(text, key, variant, decrypt=False):
+    # Letter-by-letter version of the polyalphabetic ciphers
+    shifts = [ord(char) - ord("a") for char in key.lower()]
+    result = []
+    for char in text:
+        if not (char.isascii() and char.isalpha()):
+            result.append(char)
+            continue
+        base = ord("a") if char.islower() else ord("A")
+        letter = ord(char) - base
+        shift = shifts[len([c for c in result if c.isascii() and c.isalpha()]) % len(shifts)] \
+            if variant != "autokey" else shifts[0]
+        if variant == "beaufort":
+            out = (shift - letter) % 26
+        elif variant == "vigenere":
+            out = (letter - shift if decrypt else letter + shift) % 26
+        else:
+            out = (letter - shift if decrypt else letter + shift) % 26
+            plain = out if decrypt else letter
+            shifts = shifts[1:] + [plain]
+        result.append(chr(base + out))
+    return "".join(result)
+
+
+@pytest.mark.parametrize("variant, key, expected", [("vigenere", "LEMON", "LXFOPVEFRNHR"),
+                                                    ("beaufort", "LEMON", "LLTOLBETLNPR"),
+                                                    ("autokey", "QUEENLY", "QNXEPVYTWTWP")])
+def test_polyalphabetic_known_answers(variant, key, expected):
+    response = client.post("/vigenere/encrypt", json={"text": "ATTACKATDAWN", "key": key, "variant": variant})
+    assert response.json()["result"] == expected
+
+
+@pytest.mark.parametrize("variant", ["vigenere", "beaufort", "autokey"])
+@pytest.mark.parametrize("key", ["K", "Lemon", "CRYPTOGRAPHY"])
+@pytest.mark.parametrize("text", ["", "Attack at dawn! Défendez l'est, 42 times.", "a-b c\nd ☃ Zz" * 5])
+def test_polyalphabetic_round_trip(variant, key, text):
+    encrypted = client.post("/vigenere/encrypt", json={"text": text, "key": key, "variant": variant}).json()["result"]
+    assert encrypted == reference_polyalphabetic(text, key, variant)
+    decrypted = client.post("/vigenere/decrypt", json={"text": encrypted, "key": key, "variant": variant})
+    assert decrypted.json()["result"] == text
+
+
+@pytest.mark.parametrize("key", ["", "ab1", "clé"])
+def test_polyalphabetic_rejects_bad_keys(key):
+    assert client.post("/vigenere/encrypt", json={"text": "Attack", "key": key}).status_code == 400
+
+
+@pytest.mark.parametrize("variant", ["vigenere", "beaufort"])
+def test_vigenere_attack_recovers_key(variant):
+    from language_model import CORPUS_PATH
+    from polyalphabetic import encrypt
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        plaintext = f.read()[5000:9000]
+    ciphertext = encrypt(plaintext, "CRYPTOGRAPHY", variant)
+    request = {"text": ciphertext, "variant": variant, "include": "preview", "preview_length": 50}
+    best = client.post("/vigenere/attack", json=request).json()["results"][0]
+    assert best["key"] == "CRYPTOGRAPHY"
+    assert best["decrypted"] == plaintext[:50]
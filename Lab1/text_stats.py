@@ -0,0 +1,162 @@
+from typing import Optional, Tuple
+import numpy as np
+
+# Every Latin-1 character, in code order
+LATIN1 = ''.join(chr(i) for i in range(256))
+
+# Character categories used for frequency scoring: the letters a-z (case
+# folded), other printable characters and unprintable characters
+LETTER_CATEGORIES = 26
+OTHER_CATEGORY = 26
+UNPRINTABLE_CATEGORY = 27
+CATEGORY_COUNT = 28
+
+
+def category_of(char: str) -> int:
+    """Scoring category of a single character"""
+    lower = char.lower()
+    if 'a' <= lower <= 'z':
+        return ord(lower) - ord('a')
+    if char.isprintable() or char.isspace():
+        return OTHER_CATEGORY
+    return UNPRINTABLE_CATEGORY
+
+
+# Lookup tables indexed by Latin-1 code
+CATEGORIES = np.array([category_of(char) for char in LATIN1], dtype=np.uint8)
+FOLDED = np.array([ord(char.lower()) for char in LATIN1], dtype=np.uint8)
+ALPHABETIC = np.array([char.isalpha() for char in LATIN1])
+
+
+def to_codes(text: str) -> Tuple[np.ndarray, int]:
+    """
+    Convert text to an array of Latin-1 codes
+    Parameters:
+        text (str): Text to convert
+    Returns:
+        Tuple[np.ndarray, int]: uint8 codes of the Latin-1 characters, and the
+            number of characters outside Latin-1 that were left out
+    """
+    try:
+        return np.frombuffer(text.encode('latin-1'), dtype=np.uint8), 0
+    except UnicodeEncodeError:
+        wide = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        latin1 = wide < 256
+        return wide[latin1].astype(np.uint8), int(len(wide) - np.count_nonzero(latin1))
+
+
+def index_of_coincidence(counts: np.ndarray) -> float:
+    """
+    Probability that two characters drawn without replacement are equal
+    Parameters:
+        counts (np.ndarray): Count per symbol
+    Returns:
+        float: Index of coincidence (0.0 for fewer than two characters)
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    if total < 2:
+        return 0.0
+    return float((counts * (counts - 1)).sum() / (total * (total - 1)))
+
+
+class TextStats:
+    """
+    Unigram, bigram and trigram counts of a text, built with np.bincount
+    Text can be added chunk by chunk with update(); n-grams spanning chunk
+    boundaries are counted, so the result does not depend on how the text was
+    split. Counts cover Latin-1 characters only: other characters add to
+    `total` but are skipped when forming n-grams.
+    Attributes:
+        order (int): Longest n-gram counted (1-3)
+        total (int): Number of characters seen
+        unigrams (np.ndarray): Count per Latin-1 code (256 entries)
+        bigrams (np.ndarray): Count per pair, indexed by first * 256 + second
+        trigram_codes (np.ndarray): Sorted codes (first << 16 | second << 8 | third)
+                                    of the trigrams seen
+        trigram_counts (np.ndarray): Counts matching `trigram_codes`
+    """
+
+    def __init__(self, text: str = "", order: int = 2):
+        if not 1 <= order <= 3:
+            raise ValueError("order must be between 1 and 3")
+        self.order = order
+        self.total = 0
+        self.unigrams = np.zeros(256, dtype=np.int64)
+        self.bigrams = np.zeros(256 * 256, dtype=np.int64) if order >= 2 else None
+        # Trigrams are kept sparse: a dense table would need 2**24 counters
+        self.trigram_codes = np.zeros(0, dtype=np.uint32)
+        self.trigram_counts = np.zeros(0, dtype=np.int64)
+        self._tail = np.zeros(0, dtype=np.uint8)
+        if text:
+            self.update(text)
+
+    def update(self, text: str) -> "TextStats":
+        """Add the next chunk of text to the counts"""
+        codes, skipped = to_codes(text)
+        return self.update_codes(codes, skipped)
+
+    def update_codes(self, codes: np.ndarray, skipped: int = 0) -> "TextStats":
+        """
+        Add the next chunk, already converted to uint8 codes (a strided view is fine)
+        Parameters:
+            codes (np.ndarray): uint8 codes of the chunk
+            skipped (int): Characters of the chunk left out of `codes`
+        """
+        self.total += len(codes) + skipped
+        self.unigrams += np.bincount(codes, minlength=256)
+        if self.order == 1:
+            return self
+
+        # The tail holds the last order - 1 codes of the previous chunk; bigrams
+        # starting in its first code were counted with that chunk already
+        carried = len(self._tail)
+        codes = np.concatenate((self._tail, codes)) if carried else codes
+        wide = codes.astype(np.uint32)
+        start = max(carried - 1, 0)
+        if len(codes) - start >= 2:
+            self.bigrams += np.bincount((wide[start:-1] << 8) | wide[start + 1:], minlength=256 * 256)
+        if self.order == 3 and len(codes) >= 3:
+            trigrams = (wide[:-2] << 16) | (wide[1:-1] << 8) | wide[2:]
+            self._add_trigrams(*np.unique(trigrams, return_counts=True))
+        self._tail = codes[-(self.order - 1):].copy()
+        return self
+
+    def _add_trigrams(self, codes: np.ndarray, counts: np.ndarray) -> None:
+        merged, inverse = np.unique(np.concatenate((self.trigram_codes, codes)), return_inverse=True)
+        weights = np.concatenate((self.trigram_counts, counts))
+        self.trigram_codes = merged
+        self.trigram_counts = np.bincount(inverse, weights=weights, minlength=len(merged)).astype(np.int64)
+
+    def category_counts(self, table: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Count characters per scoring category
+        Parameters:
+            table (np.ndarray): Optional 256-entry code mapping (e.g. a decryption
+                                table) applied before categorizing
+        Returns:
+            np.ndarray: CATEGORY_COUNT counts; characters outside Latin-1 are not included
+        """
+        categories = CATEGORIES if table is None else CATEGORIES[table]
+        return np.bincount(categories, weights=self.unigrams, minlength=CATEGORY_COUNT)
+
+    def letter_counts(self) -> np.ndarray:
+        """Case-folded counts of the Latin-1 letters, indexed by code"""
+        return np.bincount(FOLDED, weights=self.unigrams * ALPHABETIC, minlength=256).astype(np.int64)
+
+    def frequency_order(self) -> str:
+        """Letters ordered from most to least frequent, ties in alphabetical order"""
+        counts = self.letter_counts()
+        used = np.flatnonzero(counts)
+        # lexsort sorts by its last key first
+        order = used[np.lexsort((used, -counts[used]))]
+        return order.astype(np.uint8).tobytes().decode('latin-1')
+
+    def index_of_coincidence(self, letters_only: bool = False) -> float:
+        """Index of coincidence over all characters, or over case-folded letters"""
+        return index_of_coincidence(self.letter_counts() if letters_only else self.unigrams)
+
+
+def frequency_order(text: str) -> str:
+    """Letters of `text` ordered from most to least frequent (case-folded)"""
+    return TextStats(text, order=1).frequency_order()
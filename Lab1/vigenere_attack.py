@@ -0,0 +1,190 @@
+from typing import Dict, List, Optional
+import numpy as np
+
+from frequency_analysis import chi_squared_scores
+from language_model import get_model, DEFAULT_LANGUAGE
+from polyalphabetic import decrypt, letter_mask
+from word_scorer import get_word_scorer, DEFAULT_SAMPLE_SIZE as WORD_SAMPLE_SIZE
+from text_stats import TextStats, to_codes, index_of_coincidence, CATEGORY_COUNT, LETTER_CATEGORIES
+
+# Index of coincidence of English letters and of uniformly random letters
+ENGLISH_IOC = 0.0667
+RANDOM_IOC = 1 / 26
+
+DEFAULT_MAX_KEY_LENGTH = 20
+
+# Key lengths solved in full, after ranking every length up to the maximum
+DEFAULT_LENGTH_CANDIDATES = 3
+
+# Repeated trigrams sampled for the Kasiski examination
+MAX_KASISKI_DISTANCES = 100_000
+
+# Plaintext letter p under key letter k comes from ciphertext letter
+# COLUMN_INDEX[variant][k, p]
+_P, _K = np.meshgrid(np.arange(26), np.arange(26))
+COLUMN_INDEX = {
+    "vigenere": (_P + _K) % 26,
+    "beaufort": (_K - _P) % 26,
+}
+
+
+def letter_offsets(text: str) -> np.ndarray:
+    """The letters A-Z of a text, case folded, as offsets 0-25"""
+    codes, _ = to_codes(text)
+    return (codes[letter_mask(codes)] | 32).astype(np.intp) - ord('a')
+
+
+def column_counts(offsets: np.ndarray, period: int) -> np.ndarray:
+    """
+    Letter counts of each key column, counted over strided views of the letters
+    Returns:
+        np.ndarray: Array of shape (period, 26)
+    """
+    codes = offsets.astype(np.uint8)
+    return np.stack([TextStats(order=1).update_codes(codes[column::period]).unigrams[:26]
+                     for column in range(period)])
+
+
+def kasiski_distances(offsets: np.ndarray, limit: int = MAX_KASISKI_DISTANCES) -> np.ndarray:
+    """
+    Distances between consecutive occurrences of each repeated trigram
+    The trigram counts single out the repeated trigrams; only their positions
+    are sorted (stably, so positions stay increasing within a trigram) instead
+    of being searched pairwise.
+    """
+    if len(offsets) < 3:
+        return np.zeros(0, dtype=np.intp)
+    stats = TextStats(order=3).update_codes(offsets.astype(np.uint8))
+    repeated = stats.trigram_codes[stats.trigram_counts > 1]
+    wide = offsets.astype(np.uint32)
+    trigrams = (wide[:-2] << 16) | (wide[1:-1] << 8) | wide[2:]
+    positions = np.flatnonzero(np.isin(trigrams, repeated))
+    trigrams = trigrams[positions]
+    order = np.argsort(trigrams, kind="stable")
+    same = trigrams[order[1:]] == trigrams[order[:-1]]
+    return (positions[order[1:]] - positions[order[:-1]])[same][:limit]
+
+
+def key_lengths(offsets: np.ndarray, max_key_length: int = DEFAULT_MAX_KEY_LENGTH) -> List[Dict[str, float]]:
+    """
+    Rank key lengths by index of coincidence and Kasiski examination
+    For the right length every column is a Caesar-shifted English text, so the
+    average column IoC approaches English; `ioc` is normalized so random text
+    scores 0 and English 1. `kasiski` is the share of repeated-trigram distances
+    divisible by the length, less the share expected by chance. Multiples of
+    the key length score about as well on IoC but lower on Kasiski.
+    Parameters:
+        offsets (np.ndarray): Ciphertext letters as offsets 0-25
+        max_key_length (int): Longest key length considered
+    Returns:
+        List[Dict[str, float]]: length, ioc, kasiski and combined score, best first
+    """
+    distances = kasiski_distances(offsets)
+    candidates = []
+    for length in range(1, max(1, min(max_key_length, len(offsets) // 2)) + 1):
+        counts = column_counts(offsets, length)
+        ioc = np.mean([index_of_coincidence(column) for column in counts])
+        ioc = (ioc - RANDOM_IOC) / (ENGLISH_IOC - RANDOM_IOC)
+        kasiski = max(0.0, float(np.mean(distances % length == 0)) - 1 / length) if len(distances) else 0.0
+        candidates.append({"length": length, "ioc": round(float(ioc), 3), "kasiski": round(kasiski, 3),
+                           "score": ioc + kasiski})
+    candidates.sort(key=lambda candidate: -candidate["score"])
+    return candidates
+
+
+def solve_columns(counts: np.ndarray, variant: str = "vigenere",
+                  letter_frequencies: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Recover each key letter independently, as a Caesar attack on its column
+    All 26 key letters of every column are scored at once with chi-squared.
+    Parameters:
+        counts (np.ndarray): Ciphertext letter counts per column, shape (L, 26)
+        variant (str): "vigenere" or "beaufort"
+        letter_frequencies (np.ndarray): Expected plaintext letter frequencies
+    Returns:
+        np.ndarray: Best key shift per column
+    """
+    plain = counts[:, COLUMN_INDEX[variant]]  # (L, key letter, plaintext letter)
+    category_counts = np.zeros(plain.shape[:2] + (CATEGORY_COUNT,))
+    category_counts[..., :LETTER_CATEGORIES] = plain
+    scores = chi_squared_scores(category_counts.reshape(-1, CATEGORY_COUNT),
+                                letter_frequencies=letter_frequencies).reshape(plain.shape[:2])
+    return scores.argmin(axis=1)
+
+
+def shortest_period(key: str) -> str:
+    """Reduce a repeated key such as LEMONLEMON to LEMON"""
+    for period in range(1, len(key)):
+        if len(key) % period == 0 and key == key[:period] * (len(key) // period):
+            return key[:period]
+    return key
+
+
+def vigenere_attack(ciphertext: str, variant: str = "vigenere", max_key_length: int = DEFAULT_MAX_KEY_LENGTH,
+                    lengths: int = DEFAULT_LENGTH_CANDIDATES, include: str = "full",
+                    preview_length: Optional[int] = None,
+                    language: str = DEFAULT_LANGUAGE) -> List[Dict[str, object]]:
+    """
+    Recover the key of a Vigenère or Beaufort ciphertext
+    The best `lengths` key lengths are solved column by column; the resulting
+    keys are ranked by the dictionary-word coverage of their plaintext
+    (`confidence`), then by the chi-squared score of the whole plaintext. The
+    work is a few passes over the letters per key length, so it grows linearly
+    with the ciphertext.
+    Parameters:
+        ciphertext (str): The encrypted text to attack
+        variant (str): "vigenere" or "beaufort"
+        max_key_length (int): Longest key length considered
+        lengths (int): Number of key lengths solved
+        include (str): Plaintext returned per candidate: "full", "preview" or "none"
+        preview_length (int): Characters decrypted for "preview"
+        language (str): Language of the plaintext, selecting its letter frequencies
+    Returns:
+        List[Dict]: Candidate keys with their scores, most likely first
+    """
+    offsets = letter_offsets(ciphertext)
+    if not len(offsets):
+        return []
+    letter_frequencies = get_model(language).letter_frequencies
+    results = {}
+    for candidate in key_lengths(offsets, max_key_length)[:lengths]:
+        counts = column_counts(offsets, candidate["length"])
+        shifts = solve_columns(counts, variant, letter_frequencies)
+        key = shortest_period(''.join(chr(ord('A') + shift) for shift in shifts))
+        if key in results:
+            continue
+        plain = counts[np.arange(len(shifts))[:, None], COLUMN_INDEX[variant][shifts]].sum(axis=0)
+        category_counts = np.zeros(CATEGORY_COUNT)
+        category_counts[:LETTER_CATEGORIES] = plain
+        results[key] = {
+            "key": key,
+            "key_length": len(key),
+            "score": round(float(chi_squared_scores(category_counts, letter_frequencies=letter_frequencies)[0]), 3),
+            "ioc": candidate["ioc"],
+            "kasiski": candidate["kasiski"],
+            "description": f"Key length {len(key)}: {key}",
+        }
+    scorer = get_word_scorer(language)
+    for result in results.values():
+        sample = decrypt(ciphertext[:WORD_SAMPLE_SIZE], result["key"], variant)
+        result["confidence"] = round(scorer.coverage(sample), 3)
+    ranked = sorted(results.values(), key=lambda result: (-result["confidence"], result["score"]))
+    for result in ranked:
+        if include == "full":
+            result["decrypted"] = decrypt(ciphertext, result["key"], variant)
+        elif include == "preview":
+            result["decrypted"] = decrypt(ciphertext[:preview_length], result["key"], variant)
+    return ranked
+
+
+if __name__ == "__main__":
+    from language_model import CORPUS_PATH
+    from polyalphabetic import encrypt
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        plaintext = f.read()[:2000]
+    ciphertext = encrypt(plaintext, "CRYPTOGRAPHY")
+    for result in vigenere_attack(ciphertext, include="preview", preview_length=60):
+        print(f"{result['key']:<20} confidence {result['confidence']:.3f}  score {result['score']:10.3f}  "
+              f"ioc {result['ioc']:.3f}  "
+              f"kasiski {result['kasiski']:.3f}  {result['decrypted']!r}")
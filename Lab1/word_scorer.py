@@ -0,0 +1,123 @@
+from typing import Iterable, List, Sequence, Tuple
+from collections import deque
+from functools import lru_cache
+
+from language_model import (get_model, CHAR_CLASSES, CLASS_COUNT, LETTER_CLASSES, SPACE_CLASS,
+                            DEFAULT_LANGUAGE)
+
+# Shorter words match inside almost any text, so they are left out
+MIN_WORD_LENGTH = 3
+
+# Characters of each candidate plaintext scanned for its confidence
+DEFAULT_SAMPLE_SIZE = 1000
+
+
+class WordScorer:
+    """
+    Dictionary-word coverage of candidate plaintexts
+    The words are compiled once into an Aho-Corasick automaton, flattened into
+    a dense transition table, so a text is scanned in a single pass with one
+    table lookup per character over the language model's character classes
+    (letters, whitespace, everything else); all words ending at a character are found at
+    once through the failure links. Words are matched anywhere, so plaintexts
+    with garbled or missing spaces still score.
+    """
+
+    def __init__(self, words: Iterable[str], min_length: int = MIN_WORD_LENGTH):
+        # Trie of the words, then failure links breadth first
+        children = [{}]
+        longest = [0]
+        for word in words:
+            if len(word) < min_length or not word.isascii() or not word.isalpha():
+                continue
+            state = 0
+            for symbol in word.lower().encode("ascii").translate(CHAR_CLASSES):
+                next_state = children[state].get(symbol)
+                if next_state is None:
+                    next_state = len(children)
+                    children[state][symbol] = next_state
+                    children.append({})
+                    longest.append(0)
+                state = next_state
+            longest[state] = len(word)
+
+        # delta[state * CLASS_COUNT + symbol] is the next state; whitespace and
+        # other characters end every match
+        delta = [0] * (len(children) * CLASS_COUNT)
+        fail = [0] * len(children)
+        queue = deque()
+        for symbol, child in children[0].items():
+            delta[symbol] = child
+            queue.append(child)
+        while queue:
+            state = queue.popleft()
+            # Longest word ending here, including words that are proper suffixes
+            longest[state] = max(longest[state], longest[fail[state]])
+            row = state * CLASS_COUNT
+            fail_row = fail[state] * CLASS_COUNT
+            for symbol in range(LETTER_CLASSES):
+                child = children[state].get(symbol)
+                if child is None:
+                    delta[row + symbol] = delta[fail_row + symbol]
+                else:
+                    fail[child] = delta[fail_row + symbol]
+                    delta[row + symbol] = child
+                    queue.append(child)
+
+        self.states = len(children)
+        self._delta = delta
+        self._longest = longest
+
+    def coverage(self, text: str) -> float:
+        """
+        Share of the characters that are whitespace or part of a dictionary word
+        Parameters:
+            text (str): Candidate plaintext
+        Returns:
+            float: Confidence between 0.0 and 1.0 (0.0 for empty text)
+        """
+        if not text:
+            return 0.0
+        symbols = text.encode("latin-1", "replace").translate(CHAR_CLASSES)
+        delta = self._delta
+        longest = self._longest
+        state = 0
+        covered = 0
+        covered_until = -1  # Last position already counted as covered
+        for i, symbol in enumerate(symbols):
+            state = delta[state * CLASS_COUNT + symbol]
+            length = longest[state]
+            if length:
+                covered += i - max(i - length, covered_until)
+                covered_until = i
+        return (covered + symbols.count(SPACE_CLASS)) / len(symbols)
+
+    def prefilter(self, texts: Sequence[str], keep: int,
+                  sample_size: int = DEFAULT_SAMPLE_SIZE) -> List[Tuple[int, float]]:
+        """
+        Pick the candidates worth decrypting in full
+        Parameters:
+            texts (Sequence[str]): Candidate plaintexts, or their first
+                                   `sample_size` characters
+            keep (int): Number of candidates to keep
+            sample_size (int): Characters of each candidate scanned
+        Returns:
+            List[Tuple[int, float]]: (index, confidence) of the `keep`
+                                     best-covered candidates, best first;
+                                     ties keep their input order
+        """
+        scores = [self.coverage(text[:sample_size]) for text in texts]
+        return [(i, scores[i]) for i in sorted(range(len(texts)), key=lambda i: -scores[i])[:keep]]
+
+
+@lru_cache(maxsize=None)
+def get_word_scorer(language: str = DEFAULT_LANGUAGE) -> WordScorer:
+    """Return the scorer for a language's word list, built once per process"""
+    return WordScorer(get_model(language).words)
+
+
+if __name__ == "__main__":
+    scorer = get_word_scorer()
+    print(f"{scorer.states} automaton states")
+    for text in ("The secret meeting is at noon", "Thesecretmeetingisatnoon", "Wkh vhfuhw phhwlqj lv dw qrrq"):
+        print(f"{scorer.coverage(text):.3f}  {text}")